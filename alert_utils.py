@@ -1,8 +1,13 @@
+import atexit
+import queue
 import requests
 import os
 import datetime
+import threading
+import time
 from dotenv import load_dotenv
 from plyer import notification
+from metrics import incr, span
 
 load_dotenv()
 
@@ -10,17 +15,35 @@ load_dotenv()
 MUTE_ALERTS = os.getenv("MUTE_ALERTS", "false").lower() == "true"
 WORK_HOURS_ONLY = os.getenv("DESKTOP_ONLY_DURING_WORK_HOURS", "false").lower() == "true"
 LOG_ALERTS = True  # Always log alerts (could make this configurable too)
+ALERT_LOG_FILE = "alerts.log"
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+ALERT_BATCH_WINDOW = float(os.getenv("ALERT_BATCH_WINDOW", "2"))  # seconds to gather a burst into one message
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MAX_CHARS = 4096  # Telegram's limit for one message
+TELEGRAM_MAX_RETRIES = 5
+TELEGRAM_TIMEOUT = 15  # seconds
+BATCH_SEPARATOR = "\n\n— — —\n\n"
+PRIORITY_HIGH = "high"  # delivered without waiting out the batch window, first in its batch
+PRIORITY_NORMAL = "normal"
+
+_session = requests.Session()
+_log_lock = threading.Lock()
+_log_file = None
 
 
 def log_alert(title, message, method):
+    global _log_file
     if not LOG_ALERTS:
         return
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] ({method}) {title}: {message}"
     print(log_entry)
     # Optional: write to file
-    with open("alerts.log", "a", encoding="utf-8") as f:
-        f.write(log_entry + "\n")
+    with _log_lock:
+        if _log_file is None:
+            _log_file = open(ALERT_LOG_FILE, "a", encoding="utf-8")
+        _log_file.write(log_entry + "\n")
+        _log_file.flush()
 
 
 def is_work_hours():
@@ -31,22 +54,43 @@ def is_work_hours():
 def send_telegram_notification(title, message):
     if MUTE_ALERTS:
         return
+    if post_telegram_text(f"{title}\n\n{message}"):
+        log_alert(title, message, method="Telegram")
+
+
+def post_telegram_text(text):
+    """POST one message to Telegram over the shared session, waiting out 429s; True on success."""
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     chat_id = os.getenv("TELEGRAM_CHAT_ID")
     if not token or not chat_id:
         print("Telegram not configured.")
-        return
+        return False
 
-    full_message = f"{title}\n\n{message}"
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        response = requests.post(url, data={"chat_id": chat_id, "text": full_message})
-        if response.status_code != 200:
-            print(f"Telegram error: {response.text}")
+    url = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
+    delay = 1
+    for attempt in range(1, TELEGRAM_MAX_RETRIES + 1):
+        try:
+            with span("alert_send", channel="telegram"):
+                response = _session.post(url, data={"chat_id": chat_id, "text": text}, timeout=TELEGRAM_TIMEOUT)
+        except Exception as e:
+            print(f"Failed to send Telegram notification: {e}")
+            wait = delay
         else:
-            log_alert(title, message, method="Telegram")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+            if response.status_code == 200:
+                return True
+            if response.status_code != 429 and response.status_code < 500:
+                print(f"Telegram error: {response.text}")
+                return False
+            try:
+                wait = float(response.json()["parameters"]["retry_after"])
+            except Exception:
+                wait = delay
+            print(f"Telegram error {response.status_code}; retrying in {wait:.0f}s")
+        if attempt < TELEGRAM_MAX_RETRIES:
+            incr("telegram_retries")
+            time.sleep(wait)
+            delay *= 2
+    return False
 
 
 def send_desktop_notification(title, message):
@@ -55,16 +99,142 @@ def send_desktop_notification(title, message):
     if WORK_HOURS_ONLY and not is_work_hours():
         return
     try:
-        notification.notify(
-            title=title,
-            message=message,
-            timeout=10
-        )
+        with span("alert_send", channel="desktop"):
+            notification.notify(
+                title=title,
+                message=message,
+                timeout=10
+            )
         log_alert(title, message, method="Desktop")
     except Exception as e:
         print(f"Failed to send desktop notification: {e}")
 
 
-def send_alert(title, message):
-    send_telegram_notification(title, message)
-    send_desktop_notification(title, message)
+def pack_telegram_messages(alerts, limit=TELEGRAM_MAX_CHARS):
+    """Join (title, message) alerts into as few Telegram-sized texts as possible."""
+    texts = []
+    current = ""
+    for title, message in alerts:
+        block = f"{title}\n\n{message}"
+        # An alert that is too long on its own is split across messages
+        pieces = [block[i:i + limit] for i in range(0, len(block), limit)] or [""]
+        for piece in pieces:
+            if current and len(current) + len(BATCH_SEPARATOR) + len(piece) <= limit:
+                current += BATCH_SEPARATOR + piece
+            else:
+                if current:
+                    texts.append(current)
+                current = piece
+    if current:
+        texts.append(current)
+    return texts
+
+
+class AlertDispatcher:
+    """Sends alerts from a background thread so callers never wait on the network.
+
+    Alerts that arrive within batch_window seconds of each other are coalesced
+    into as few Telegram messages and desktop notifications as possible. A
+    high-priority alert closes the batch at once and is listed first. The
+    queue is bounded; when it is full, send() blocks until there is room.
+    """
+
+    def __init__(self, queue_size=ALERT_QUEUE_SIZE, batch_window=ALERT_BATCH_WINDOW):
+        self.batch_window = batch_window
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def send(self, title, message, priority=PRIORITY_NORMAL):
+        self._queue.put((title, message, priority))
+
+    def flush(self, timeout=None):
+        """Block until every queued alert has been delivered (or given up on)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=60):
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            stop = False
+            while first[2] != PRIORITY_HIGH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stop = True
+                    break
+                batch.append(alert)
+                if alert[2] == PRIORITY_HIGH:
+                    break
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                print(f"Failed to deliver {len(batch)} alert(s): {e}")
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, batch):
+        if MUTE_ALERTS:
+            return
+        batch = [(f"\u203C\uFE0F {title}" if priority == PRIORITY_HIGH else title, message)
+                 for title, message, priority in sorted(batch, key=lambda alert: alert[2] != PRIORITY_HIGH)]
+        delivered = [post_telegram_text(text) for text in pack_telegram_messages(batch)]
+        incr("alerts_sent", len(batch))
+        if delivered and all(delivered):
+            for title, message in batch:
+                log_alert(title, message, method="Telegram")
+        if len(batch) == 1:
+            send_desktop_notification(*batch[0])
+        else:
+            titles = "\n".join(title for title, _ in batch)
+            send_desktop_notification(f"{len(batch)} new alerts", titles[:250])
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Process-wide AlertDispatcher, started on first use and flushed at exit."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+
+def flush_alerts(timeout=None):
+    if _dispatcher is not None:
+        return _dispatcher.flush(timeout)
+    return True
+
+
+def send_alert(title, message, priority=PRIORITY_NORMAL):
+    """Queue an alert for Telegram and desktop delivery; returns immediately."""
+    if MUTE_ALERTS:
+        return
+    get_dispatcher().send(title, message, priority)
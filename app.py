@@ -1,31 +1,165 @@
-
-from flask import Flask, render_template, request
-from scraper import get_otc_news
+import os
+import time
+from datetime import datetime, timedelta
+from flask import Flask, Response, abort, g, jsonify, render_template, request
+from dashboard_service import NO_STATUS, DashboardService, paginate
 from watchlist import load_watchlist
 from apscheduler.schedulers.background import BackgroundScheduler
+from metrics import metrics
+
+METRICS_ENDPOINT = os.getenv("METRICS_ENDPOINT", "false").lower() == "true"
 
 app = Flask(__name__)
-ticker_news_cache = {}
+service = DashboardService()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.errorhandler(400)
+def bad_request(error):
+    return jsonify(error=error.description), 400
+
+@app.after_request
+def record_request(response):
+    metrics.observe("http_request", time.perf_counter() - g.request_start,
+                    endpoint=request.endpoint or "unknown", status=str(response.status_code))
+    return response
 
 def update_watchlist_news():
     print("⏱️ Running watchlist scan...")
-    for ticker in load_watchlist():
-        try:
-            news = get_otc_news(ticker)
-            ticker_news_cache[ticker] = news
-        except Exception as e:
-            print(f"Error updating {ticker}: {e}")
+    service.refresh_and_wait(load_watchlist())
 
+# The first scan runs in the background right away, so the app serves immediately
 scheduler = BackgroundScheduler()
-scheduler.add_job(update_watchlist_news, 'interval', minutes=30)
+scheduler.add_job(update_watchlist_news, 'interval', minutes=30, next_run_time=datetime.now())
 scheduler.start()
-update_watchlist_news()
+
+def json_page(items, key=None, render=None, **extra):
+    """Paginated JSON response with an ETag; repeat requests with If-None-Match get a 304.
+
+    render, if given, turns the page into its JSON items, so per-item work is done for one page only.
+    """
+    try:
+        page, next_cursor = paginate(items, request.args.get("cursor"), request.args.get("limit"), key)
+    except ValueError as e:
+        abort(400, str(e))
+    if render:
+        page = render(page)
+    response = jsonify(items=page, next_cursor=next_cursor, **extra)
+    response.add_etag()
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+def status_items(listed):
+    return [{"source": source, "since": entered} for source, entered in listed]
+
+def valid_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        abort(400, "date must be YYYY-MM-DD")
 
 @app.route("/", methods=["GET", "POST"])
 def index():
+    # The page itself is static; news and status load lazily from the /api endpoints
     ticker = request.form.get("ticker", "").strip().upper() if request.method == "POST" else ""
-    news = ticker_news_cache.get(ticker, []) if ticker else []
-    return render_template("index.html", ticker=ticker, news=news, watchlist=ticker_news_cache)
+    return render_template("index.html", ticker=ticker)
+
+@app.route("/api/tickers")
+def api_tickers():
+    """Watchlist tickers with their CE/EM status. Filters: q (prefix), status (any|none|source name)."""
+    tickers = load_watchlist()
+    prefix = request.args.get("q", "").strip().upper()
+    if prefix:
+        tickers = [t for t in tickers if t.startswith(prefix)]
+    status_filter = request.args.get("status")
+    status = service.get_status(tickers) if status_filter else {}
+    if status_filter == "any":
+        tickers = [t for t in tickers if status.get(t, NO_STATUS)[0]]
+    elif status_filter == "none":
+        tickers = [t for t in tickers if not status.get(t, NO_STATUS)[0]]
+    elif status_filter:
+        tickers = [t for t in tickers if any(source == status_filter for source, _ in status.get(t, NO_STATUS)[0])]
+
+    def render(page):
+        status = service.get_status(page)
+        cached = service.cached_news(page)
+        items = []
+        for t in page:
+            listed, last_change = status.get(t, NO_STATUS)
+            items.append({
+                "ticker": t,
+                "status": status_items(listed),
+                "last_change": last_change,
+                "news_count": len(cached[t]),
+            })
+        return items
+
+    return json_page(tickers, key=str, render=render)
+
+@app.route("/api/news/<ticker>")
+def api_news(ticker):
+    """News for one ticker (watched or not) with its CE/EM status; fetched on demand if it is not cached.
+    Filter: q (headline substring)."""
+    ticker = ticker.upper()
+    news = service.get_news(ticker)
+    query = request.args.get("q", "").strip().lower()
+    if query:
+        news = [item for item in news if query in item.get("headline", "").lower()]
+    listed, last_change = service.get_status([ticker]).get(ticker, NO_STATUS)
+    return json_page(news, ticker=ticker, status=status_items(listed), last_change=last_change)
+
+@app.route("/api/changes")
+def api_changes():
+    """CE/EM entries and exits on a date (default today). Filters: source, type (entry|exit)."""
+    date_str = valid_date(request.args.get("date") or datetime.today().strftime("%Y-%m-%d"))
+    entries, exits = service.get_changes(date_str)
+    changes = [{"type": "entry", "source": s, "ticker": t} for s, t in entries]
+    changes += [{"type": "exit", "source": s, "ticker": t} for s, t in exits]
+    source, change_type = request.args.get("source"), request.args.get("type")
+    changes = [c for c in changes if (not source or c["source"] == source)
+               and (not change_type or c["type"] == change_type)]
+    return json_page(changes, key=lambda c: f"{c['type']}|{c['source']}|{c['ticker']}", date=date_str)
+
+@app.route("/api/status")
+def api_status():
+    """Tickers listed in CE/EM during the last 7 days. Filters: source, q (ticker prefix)."""
+    rows = [{"source": s, "ticker": t} for s, t in service.get_status_last_week()]
+    source, prefix = request.args.get("source"), request.args.get("q", "").strip().upper()
+    rows = [r for r in rows if (not source or r["source"] == source) and r["ticker"].startswith(prefix)]
+    return json_page(rows, key=lambda r: f"{r['ticker']}|{r['source']}")
+
+@app.route("/api/analytics")
+def api_analytics():
+    """CE/EM history analytics: per-source summary, daily churn for the last `days` days,
+    weekly exit cohorts and the `top` longest-listed tickers. Filters: source, within (e.g. 7,30,90)."""
+    from status_analytics import to_records
+    try:
+        within = [int(n) for n in request.args.get("within", "").split(",") if n.strip()]
+        days = int(request.args.get("days", 30))
+        top = int(request.args.get("top", 20))
+    except ValueError:
+        abort(400, "within, days and top must be integers")
+    result = service.get_analytics(request.args.get("source"), within)
+    since = (datetime.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+    churn = to_records(result["churn"])
+    listed = result["per_ticker"][result["per_ticker"]["listed"]]
+    response = jsonify(
+        summary=to_records(result["summary"]),
+        churn=[row for row in churn if row["date"] >= since],
+        cohorts=to_records(result["cohorts"]),
+        longest_listed=to_records(listed.nlargest(top, "current_days")),
+    )
+    response.add_etag()
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+if METRICS_ENDPOINT:
+    @app.route("/metrics")
+    def prometheus_metrics():
+        """Prometheus scrape target for every span and counter recorded in this process."""
+        return Response(metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,73 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alert_utils
+from fixtures import StubServer
+
+
+def per_alert(alerts):
+    """The pre-dispatcher path: one blocking Telegram post per alert."""
+    for title, message in alerts:
+        alert_utils.send_telegram_notification(title, message)
+
+
+def dispatched(alerts, batch_window):
+    dispatcher = alert_utils.AlertDispatcher(batch_window=batch_window)
+    start = time.perf_counter()
+    for title, message in alerts:
+        dispatcher.send(title, message)
+    enqueue = time.perf_counter() - start
+    dispatcher.close()
+    return enqueue
+
+
+def run(alerts=200, latency=0.05, batch_window=0.2, rate_limited=3):
+    """Deliver `alerts` alerts to a local Telegram stub answering in `latency` seconds.
+
+    The first rate_limited posts of each mode get a 429 so the retry path is timed too.
+    Desktop notifications are switched off.
+    """
+    batch = [(f"T{i:04d} - Company announces update {i}", f"Neutral. KEEP. Summary number {i}.")
+             for i in range(alerts)]
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench-token")
+    os.environ.setdefault("TELEGRAM_CHAT_ID", "1")
+    alert_utils.MUTE_ALERTS = False
+    alert_utils.send_desktop_notification = lambda title, message: None
+    result = {"alerts": alerts, "latency_seconds": latency, "batch_window_seconds": batch_window}
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        alert_utils.ALERT_LOG_FILE = os.path.join(workdir, "alerts.log")
+        for mode in ("per_alert", "dispatched"):
+            with StubServer(latency=latency, rate_limited=rate_limited) as server:
+                alert_utils.TELEGRAM_API_URL = server.url
+                start = time.perf_counter()
+                if mode == "per_alert":
+                    per_alert(batch)
+                    result["per_alert_caller_seconds"] = time.perf_counter() - start
+                else:
+                    result["dispatched_caller_seconds"] = dispatched(batch, batch_window)
+                result[f"{mode}_delivery_seconds"] = time.perf_counter() - start
+                result[f"{mode}_telegram_posts"] = server.requests
+        if alert_utils._log_file is not None:
+            alert_utils._log_file.close()
+            alert_utils._log_file = None
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-alert Telegram posts with the batching dispatcher.")
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub Telegram response delay in seconds")
+    parser.add_argument("--batch-window", type=float, default=0.2)
+    args = parser.parse_args()
+    r = run(args.alerts, args.latency, args.batch_window)
+    print(f"{r['alerts']} alerts, {r['latency_seconds'] * 1000:.0f} ms Telegram latency")
+    for mode in ("per_alert", "dispatched"):
+        print(f"  {mode:<10}: caller blocked {r[f'{mode}_caller_seconds']:6.3f} s, "
+              f"delivered in {r[f'{mode}_delivery_seconds']:6.2f} s with {r[f'{mode}_telegram_posts']} posts")
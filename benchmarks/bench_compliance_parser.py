@@ -0,0 +1,87 @@
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compliance_parser import ComplianceParser
+from fixtures import make_compliance_file
+
+CHUNK_SIZE = 8192  # ftplib.FTP.retrbinary default blocksize
+
+
+def legacy_parse(data):
+    """The pre-streaming parser: buffer, decode, splitlines, split every full row."""
+    r = io.BytesIO()
+    for start in range(0, len(data), CHUNK_SIZE):
+        r.write(data[start:start + CHUNK_SIZE])
+    r.seek(0)
+    text = r.getvalue().decode("utf-8", errors="ignore")
+    ce = set()
+    em = set()
+    header, *lines = text.splitlines()
+    cols = header.split('|')
+    idx_sym = cols.index("Symbol")
+    idx_ce = cols.index("Caveat Emptor")
+    idx_tier = cols.index("OTC Tier ID")
+    for line in lines:
+        parts = line.split('|')
+        if len(parts) <= max(idx_sym, idx_ce, idx_tier):
+            continue
+        sym = parts[idx_sym].strip()
+        if parts[idx_ce].strip() == 'Y':
+            ce.add(sym)
+        if parts[idx_tier].strip() == '40':
+            em.add(sym)
+    return ce, em
+
+
+def streaming_parse(data):
+    parser = ComplianceParser()
+    for start in range(0, len(data), CHUNK_SIZE):
+        parser.write(data[start:start + CHUNK_SIZE])
+    return parser.close().ce_em()
+
+
+def measure(func, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def run(rows=25000, repeat=5):
+    """Benchmark both parsers on one synthetic file and return the results as a dict."""
+    data = make_compliance_file(rows)
+    legacy, legacy_time, legacy_peak = measure(legacy_parse, data, repeat)
+    streaming, streaming_time, streaming_peak = measure(streaming_parse, data, repeat)
+    if legacy != streaming:
+        raise AssertionError("streaming parser disagrees with the legacy parser")
+    return {
+        "rows": rows,
+        "file_bytes": len(data),
+        "legacy_seconds": legacy_time,
+        "legacy_peak_bytes": legacy_peak,
+        "streaming_seconds": streaming_time,
+        "streaming_peak_bytes": streaming_peak,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy and streaming compliance-file parsers.")
+    parser.add_argument("--rows", type=int, default=25000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    r = run(args.rows, args.repeat)
+    print(f"Synthetic file: {r['rows']} rows, {r['file_bytes'] / 1e6:.1f} MB")
+    print(f"  legacy    : {r['legacy_seconds'] * 1000:8.1f} ms  peak {r['legacy_peak_bytes'] / 1e6:7.2f} MB")
+    print(f"  streaming : {r['streaming_seconds'] * 1000:8.1f} ms  peak {r['streaming_peak_bytes'] / 1e6:7.2f} MB")
@@ -0,0 +1,100 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alert_utils
+import ce_expert_monitor
+import otc_scraper
+import status_db
+from fixtures import StubServer
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"p50": samples[len(samples) // 2], "p95": samples[int(len(samples) * 0.95) - 1], "max": samples[-1]}
+
+
+def measure(client, urls):
+    """Latency of each GET in urls; every response must be 200."""
+    samples = []
+    for url in urls:
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise AssertionError(f"GET {url} returned {response.status_code}")
+    return samples
+
+
+def seed_status(tickers, today):
+    """Put every tenth watchlist ticker in Expert Market and record today's changes."""
+    conn = status_db.connect()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ce_expert_monitor.track_entries_and_exits("Expert Market", set(tickers[::10]), today, conn)
+    conn.close()
+
+
+def run(tickers=200, requests=200, latency=0.05):
+    """Time the dashboard routes with Flask's test client against a local RSS stub.
+
+    Runs in a scratch directory so the watchlist, status DB and feed cache are synthetic.
+    """
+    alert_utils.MUTE_ALERTS = True
+    symbols = [f"T{i:04d}" for i in range(tickers)]
+    today = date.today().isoformat()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, StubServer(latency=latency) as server:
+        os.chdir(workdir)
+        try:
+            otc_scraper.OTC_NEWS_URL = server.rss_url_template
+            # An empty watchlist keeps the start-up scan from warming the cache before we measure
+            open("watchlist.txt", "w").close()
+            import app
+            app.scheduler.shutdown(wait=True)
+            with open("watchlist.txt", "w") as f:
+                f.write("\n".join(symbols) + "\n")
+            seed_status(symbols, today)
+            client = app.app.test_client()
+
+            index = measure(client, ["/"] * requests)
+            tickers_cold = measure(client, ["/api/tickers?limit=25"])
+            news_cold = measure(client, [f"/api/news/{t}?limit=5" for t in symbols])
+            news_warm = measure(client, [f"/api/news/{t}?limit=5" for t in symbols])
+            tickers_warm = measure(client, ["/api/tickers?limit=25"] * requests)
+            changes = measure(client, [f"/api/changes?date={today}"] * requests)
+            app.service.close()
+        finally:
+            os.chdir(cwd)
+    return {
+        "tickers": tickers,
+        "requests": requests,
+        "latency_seconds": latency,
+        "index": percentiles(index),
+        "api_tickers_first_seconds": tickers_cold[0],
+        "api_tickers_warm": percentiles(tickers_warm),
+        "api_news_uncached": percentiles(news_cold),
+        "api_news_cached": percentiles(news_warm),
+        "api_changes": percentiles(changes),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure dashboard route latency offline.")
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=200, help="requests per timed route")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub RSS response delay in seconds")
+    args = parser.parse_args()
+    r = run(args.tickers, args.requests, args.latency)
+    print(f"{r['tickers']} watchlist tickers, {r['latency_seconds'] * 1000:.0f} ms feed latency")
+    print(f"  {'route':<20} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for key in ("index", "api_tickers_warm", "api_news_uncached", "api_news_cached", "api_changes"):
+        p = r[key]
+        print(f"  {key:<20} {p['p50'] * 1000:8.2f} {p['p95'] * 1000:8.2f} {p['max'] * 1000:8.2f}")
+    print(f"  first /api/tickers : {r['api_tickers_first_seconds'] * 1000:.2f} ms")
@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alert_utils
+import ce_expert_monitor
+import status_db
+from compliance_parser import ComplianceParser
+from fixtures import FakeFTPServer, make_compliance_file
+from ftp_session import ComplianceFTPSession
+
+
+def bench_fetch(rows, repeat):
+    """fetch_ce_expert_tickers_for_date against the in-memory FTP: best time and peak memory."""
+    today = date.today().isoformat()
+    server = FakeFTPServer({f"compliance-data-{today}-AM.txt": make_compliance_file(rows)})
+    best = float("inf")
+    for _ in range(repeat):
+        with ComplianceFTPSession(ftp_factory=server.connect) as session:
+            start = time.perf_counter()
+            ce, em = ce_expert_monitor.fetch_ce_expert_tickers_for_date(today, session)
+            best = min(best, time.perf_counter() - start)
+    with ComplianceFTPSession(ftp_factory=server.connect) as session:
+        session.list_files()
+        tracemalloc.start()
+        session.retrieve(f"compliance-data-{today}-AM.txt", ComplianceParser).close()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak, len(ce), len(em)
+
+
+def bench_db(rows, days, churn, workdir):
+    """save_tickers_for_date and track_entries_and_exits over `days` synthetic snapshots."""
+    snapshots = []
+    for day in range(days):
+        parser = ComplianceParser()
+        parser.write(make_compliance_file(rows, day=day, churn=churn))
+        snapshots.append(parser.close().ce_em())
+    start_day = date.today() - timedelta(days=days)
+    dates = [(start_day + timedelta(days=day)).isoformat() for day in range(days)]
+
+    conn = status_db.connect(os.path.join(workdir, "save.db"))
+    start = time.perf_counter()
+    for date_str, (ce, em) in zip(dates, snapshots):
+        ce_expert_monitor.save_tickers_for_date("Caveat Emptor", ce, date_str, conn)
+        ce_expert_monitor.save_tickers_for_date("Expert Market", em, date_str, conn)
+        conn.commit()
+    save_time = time.perf_counter() - start
+    conn.close()
+
+    conn = status_db.connect(os.path.join(workdir, "track.db"))
+    changes = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the entry/exit alerts are printed too
+        for date_str, (ce, em) in zip(dates, snapshots):
+            ce_expert_monitor.track_entries_and_exits("Caveat Emptor", ce, date_str, conn)
+            ce_expert_monitor.track_entries_and_exits("Expert Market", em, date_str, conn)
+    track_time = time.perf_counter() - start
+    for date_str in dates:
+        entries, exits = status_db.get_entries_and_exits(conn, date_str)
+        changes += len(entries) + len(exits)
+    conn.close()
+    return save_time, track_time, changes
+
+
+def run(rows=25000, days=30, churn=0.01, repeat=3):
+    alert_utils.MUTE_ALERTS = True  # entries/exits would otherwise be posted to Telegram
+    fetch_time, fetch_peak, ce, em = bench_fetch(rows, repeat)
+    with tempfile.TemporaryDirectory() as workdir:
+        save_time, track_time, changes = bench_db(rows, days, churn, workdir)
+    return {
+        "rows": rows,
+        "fetch_seconds": fetch_time,
+        "fetch_rows_per_second": rows / fetch_time,
+        "fetch_peak_bytes": fetch_peak,
+        "ce_tickers": ce,
+        "em_tickers": em,
+        "days": days,
+        "save_tickers_seconds": save_time,
+        "track_entries_exits_seconds": track_time,
+        "track_seconds_per_day": track_time / days,
+        "tracked_changes": changes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the compliance download/parse and the status DB write paths.")
+    parser.add_argument("--rows", type=int, default=25000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of rows changing flags per day")
+    args = parser.parse_args()
+    r = run(args.rows, args.days, args.churn)
+    print(f"fetch_ce_expert_tickers_for_date: {r['rows']} rows")
+    print(f"  {r['fetch_seconds'] * 1000:8.1f} ms  {r['fetch_rows_per_second']:10.0f} rows/s  "
+          f"peak {r['fetch_peak_bytes'] / 1e6:.2f} MB")
+    print(f"DB paths over {r['days']} days ({r['tracked_changes']} entries/exits)")
+    print(f"  save_tickers_for_date    : {r['save_tickers_seconds'] * 1000:8.1f} ms")
+    print(f"  track_entries_and_exits  : {r['track_entries_exits_seconds'] * 1000:8.1f} ms "
+          f"({r['track_seconds_per_day'] * 1000:.1f} ms/day)")
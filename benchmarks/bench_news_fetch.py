@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser
+
+import news_sources
+import otc_scraper
+from fixtures import StubServer
+from news_fetcher import NewsFetcher
+from scraper import get_all_news, iter_all_news
+
+
+def legacy_sequential(tickers, url_template):
+    """The pre-pool loop: one feedparser.parse(url) per ticker, one connection each."""
+    for ticker in tickers:
+        feedparser.parse(url_template.format(ticker=ticker)).entries
+
+
+def pooled_sequential(tickers, fetcher):
+    for ticker in tickers:
+        otc_scraper.get_otc_news(ticker, fetcher)
+
+
+def pooled_concurrent(tickers, fetcher):
+    for _ in iter_all_news(tickers, include_sources=["OTCMarkets"], fetcher=fetcher):
+        pass
+
+
+def syndicated_source(wire, latency):
+    """A fake source answering after `latency` seconds with wire-service copies of the stub's headlines."""
+    def fetch(ticker, fetcher):
+        time.sleep(latency)
+        return [{"title": f"{ticker} Announces Update {i} | {wire}", "date": f"Fri, {10 + i:02d} Oct 2026 14:00:00 GMT"}
+                for i in range(5)]
+    return fetch
+
+
+def multi_source(tickers, fetcher, sources):
+    """get_all_news over every source; returns (seconds, items before merging, items after)."""
+    raw = merged = 0
+    start = time.perf_counter()
+    for ticker in tickers:
+        raw += len(news_sources.fetch_all(ticker, sources, fetcher))
+        merged += len(get_all_news(ticker, sources, fetcher))
+    return (time.perf_counter() - start) / 2, raw, merged
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(tickers=200, latency=0.05, concurrency=16):
+    """Fetch `tickers` feeds from a local stub with `latency` seconds per response; returns timings."""
+    symbols = [f"T{i:04d}" for i in range(tickers)]
+    with StubServer(latency=latency) as server:
+        otc_scraper.OTC_NEWS_URL = server.rss_url_template
+        legacy = timed(legacy_sequential, symbols, server.rss_url_template)
+        with NewsFetcher(max_workers=1, per_host_rate=0) as fetcher:
+            sequential = timed(pooled_sequential, symbols, fetcher)
+        with NewsFetcher(max_workers=concurrency, per_host_rate=0) as fetcher:
+            concurrent = timed(pooled_concurrent, symbols, fetcher)
+        sources = ["OTCMarkets"]
+        for wire in ("GlobeNewswire", "Business Wire", "PR Newswire"):
+            news_sources.register_source(wire, syndicated_source(wire, latency))
+            sources.append(wire)
+        with NewsFetcher(max_workers=1, per_host_rate=0) as fetcher:
+            multi, raw, merged = multi_source(symbols[:20], fetcher, sources)
+            multi /= len(symbols[:20])
+    return {
+        "tickers": tickers,
+        "latency_seconds": latency,
+        "concurrency": concurrency,
+        "legacy_sequential_seconds": legacy,
+        "pooled_sequential_seconds": sequential,
+        "pooled_concurrent_seconds": concurrent,
+        "multi_source_sources": len(sources),
+        "multi_source_seconds_per_ticker": multi,
+        "multi_source_items_raw": raw,
+        "multi_source_items_merged": merged,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent RSS fetching against a local stub.")
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response delay in seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    r = run(args.tickers, args.latency, args.concurrency)
+    print(f"{r['tickers']} feeds, {r['latency_seconds'] * 1000:.0f} ms stub latency")
+    for key in ("legacy_sequential", "pooled_sequential", "pooled_concurrent"):
+        seconds = r[f"{key}_seconds"]
+        print(f"  {key:18}: {seconds:6.2f} s  {r['tickers'] / seconds:7.1f} feeds/s")
+    print(f"{r['multi_source_sources']} concurrent sources: {r['multi_source_seconds_per_ticker'] * 1000:.0f} ms per ticker, "
+          f"{r['multi_source_items_raw']} items merged to {r['multi_source_items_merged']}")
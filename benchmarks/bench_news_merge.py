@@ -0,0 +1,97 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from news_item import NewsItem, merge_news
+
+
+def make_records(ticker, items=5):
+    """Raw records as get_otc_news returns them, with one duplicated title."""
+    records = [{
+        "headline": f"{ticker} announces update {i}",
+        "link": f"https://example.com/{ticker}/{i}",
+        "summary": f"{ticker} press release number {i}.",
+        "date": f"Fri, {10 + i:02d} Oct 2026 13:00:00 GMT",
+    } for i in range(items)]
+    records.append(dict(records[0]))
+    return records
+
+
+def legacy_merge(records, source="OTCMarkets"):
+    """The pandas-based get_all_news body."""
+    import pandas as pd
+    all_news = []
+    for item in records:
+        item = dict(item)
+        item.setdefault("title", item.get("headline", "Untitled"))
+        item.setdefault("summary", "")
+        item.setdefault("date", "")
+        item["source"] = source
+        all_news.append(item)
+    df = pd.DataFrame(all_news)
+    df.drop_duplicates(subset=["title"], inplace=True)
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df[df["date"].notnull()]
+        df.sort_values(by="date", ascending=False, inplace=True)
+    return df.to_dict(orient="records")
+
+
+def records_merge(records, source="OTCMarkets"):
+    items = (NewsItem.from_record(record, source) for record in records)
+    return merge_news([item for item in items if item is not None])
+
+
+def import_time(statement, repeat=3):
+    """Best wall time of a fresh interpreter running `statement`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(tickers=2000, items=5):
+    batches = [make_records(f"T{i:04d}", items) for i in range(tickers)]
+    legacy_merge(batches[0])  # import pandas outside the timed loop
+
+    start = time.perf_counter()
+    legacy = [legacy_merge(records) for records in batches]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = [records_merge(records) for records in batches]
+    records_time = time.perf_counter() - start
+
+    if [[row["title"] for row in batch] for batch in legacy] != [[item.title for item in batch] for batch in merged]:
+        raise AssertionError("record merge disagrees with the pandas merge")
+    return {
+        "tickers": tickers,
+        "items_per_ticker": items,
+        "legacy_pandas_seconds": legacy_time,
+        "records_seconds": records_time,
+        "startup_python_seconds": import_time("pass"),
+        "startup_import_scraper_seconds": import_time("import scraper"),
+        "startup_import_pandas_seconds": import_time("import pandas"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the pandas and plain-record news merge.")
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+    r = run(args.tickers, args.items)
+    print(f"Merge for {r['tickers']} tickers x {r['items_per_ticker'] + 1} items")
+    print(f"  pandas  : {r['legacy_pandas_seconds'] * 1000:8.1f} ms")
+    print(f"  records : {r['records_seconds'] * 1000:8.1f} ms")
+    print("Start-up (fresh interpreter)")
+    print(f"  python -c pass      : {r['startup_python_seconds'] * 1000:6.0f} ms")
+    print(f"  import scraper      : {r['startup_import_scraper_seconds'] * 1000:6.0f} ms")
+    print(f"  import pandas alone : {r['startup_import_pandas_seconds'] * 1000:6.0f} ms")
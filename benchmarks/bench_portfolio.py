@@ -0,0 +1,91 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import FakeIB
+
+POSITIONS = {f"T{i:04d}": float(i + 1) for i in range(50)}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the portfolio feed")
+        time.sleep(0.01)
+
+
+def run(latency=0.5, reads=1000):
+    """Drive PortfolioSource against a FakeIB whose connect takes `latency` seconds.
+
+    Times a cold start (connect + sync) against reads of the saved snapshot,
+    then checks that position events reach the snapshot, that a dropped feed
+    reconnects after a failed attempt, and that a down TWS falls back to the
+    snapshot. Any check that fails raises.
+    """
+    try:
+        import portfolio_source
+    except ImportError as e:  # ib_insync not installed
+        return {"skipped": str(e)}
+    portfolio_source.RECONNECT_DELAY = 0.05
+    result = {"latency_seconds": latency, "positions": len(POSITIONS), "reads": reads}
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        path = os.path.join(workdir, "portfolio_snapshot.json")
+        ib = FakeIB(POSITIONS, latency=latency)
+        feed = portfolio_source.PortfolioSource(path, ib_factory=lambda: ib)
+        try:
+            start = time.perf_counter()
+            tickers = feed.get_portfolio_tickers(wait=latency + 5)
+            result["cold_start_seconds"] = time.perf_counter() - start
+            assert tickers == sorted(POSITIONS), "cold start returned the wrong positions"
+
+            ib.set_position("NEW", 5)
+            ib.set_position("T0000", 0)
+            reader = portfolio_source.PortfolioSource(path, ib_factory=lambda: FakeIB(fail_connects=10 ** 6))
+            assert "NEW" in reader.cached_tickers() and "T0000" not in reader.cached_tickers(), \
+                "position events did not reach the snapshot"
+
+            ib.fail_connects = 1
+            connects = ib.connects
+            dropped = time.perf_counter()
+            ib.drop()
+            wait_for(lambda: ib.connects >= connects + 2 and feed.connected)
+            result["reconnect_seconds"] = time.perf_counter() - dropped
+        finally:
+            feed.stop()
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            tickers = reader.get_portfolio_tickers()
+        result["snapshot_read_seconds"] = (time.perf_counter() - start) / reads
+        assert "NEW" in tickers
+
+        # TWS down and the snapshot too old: wait briefly, then serve the snapshot
+        start = time.perf_counter()
+        tickers = reader.get_portfolio_tickers(max_age=0, wait=0.2)
+        result["fallback_seconds"] = time.perf_counter() - start
+        reader.stop()
+        assert "NEW" in tickers, "fallback did not serve the snapshot"
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and check the IBKR portfolio feed against a fake TWS.")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake TWS connect time in seconds")
+    parser.add_argument("--reads", type=int, default=1000)
+    args = parser.parse_args()
+    r = run(args.latency, args.reads)
+    if "skipped" in r:
+        print(f"skipped: {r['skipped']}")
+        sys.exit(0)
+    print(f"{r['positions']} positions, {r['latency_seconds'] * 1000:.0f} ms connect")
+    print(f"  cold start     {r['cold_start_seconds'] * 1000:8.1f} ms")
+    print(f"  snapshot read  {r['snapshot_read_seconds'] * 1e6:8.1f} µs")
+    print(f"  reconnect      {r['reconnect_seconds'] * 1000:8.1f} ms (after one failed attempt)")
+    print(f"  TWS down       {r['fallback_seconds'] * 1000:8.1f} ms to fall back to the snapshot")
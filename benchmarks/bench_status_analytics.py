@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import status_analytics
+import status_db
+
+SOURCES = ["Caveat Emptor", "Expert Market"]
+
+
+def make_intervals(days=365, listed=5000, entries_per_day=40, mean_dwell=60, seed=42):
+    """Synthetic status_intervals rows for `days` of daily snapshots per source."""
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=days)
+    rows = []
+    for source in SOURCES:
+        next_id = 0
+        # Baseline: already listed on the first snapshot
+        for dwell in rng.exponential(mean_dwell * 3, listed).astype(int) + 1:
+            exited = start + timedelta(days=int(dwell)) if dwell < days else None
+            rows.append((source, f"S{next_id:06d}", start.isoformat(), exited and exited.isoformat()))
+            next_id += 1
+        for day in range(1, days):
+            entered = start + timedelta(days=day)
+            for dwell in rng.exponential(mean_dwell, rng.poisson(entries_per_day)).astype(int) + 1:
+                exited = entered + timedelta(days=int(dwell))
+                exited = exited.isoformat() if exited < date.today() else None
+                rows.append((source, f"S{next_id:06d}", entered.isoformat(), exited))
+                next_id += 1
+    return rows
+
+
+def python_analyze(rows, as_of):
+    """Per-ticker dwell and daily churn with plain loops, as a baseline."""
+    first_seen = {}
+    for source, _, entered, _ in rows:
+        first_seen[source] = min(first_seen.get(source, entered), entered)
+    dwell = defaultdict(int)
+    entries, exits = Counter(), Counter()
+    for source, ticker, entered, exited in rows:
+        end = date.fromisoformat(exited) if exited else as_of
+        dwell[source, ticker] += (end - date.fromisoformat(entered)).days
+        if entered != first_seen[source]:
+            entries[source, entered] += 1
+        if exited:
+            exits[source, exited] += 1
+    return dwell, entries, exits
+
+
+def run(days=365, listed=5000, entries_per_day=40, repeat=3):
+    rows = make_intervals(days, listed, entries_per_day)
+    as_of = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = status_db.connect(os.path.join(tmp, "bench.db"))
+        with conn:
+            conn.executemany(
+                "INSERT INTO status_intervals (source, ticker, entered_date, exited_date) VALUES (?, ?, ?, ?)", rows)
+
+        load_time = analyze_time = python_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            intervals = status_analytics.load_intervals(conn)
+            load_time = min(load_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = status_analytics.analyze(intervals, as_of)
+            analyze_time = min(analyze_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            db_rows = conn.execute("SELECT source, ticker, entered_date, exited_date FROM status_intervals").fetchall()
+            dwell, entries, exits = python_analyze(db_rows, as_of)
+            python_time = min(python_time, time.perf_counter() - start)
+        conn.close()
+
+    if result["per_ticker"]["total_days"].sum() != sum(dwell.values()) \
+            or result["churn"]["entries"].sum() != sum(entries.values()) \
+            or result["churn"]["exits"].sum() != sum(exits.values()):
+        raise AssertionError("vectorized analytics disagree with the loop baseline")
+    return {
+        "days": days,
+        "intervals": len(rows),
+        "load_seconds": load_time,
+        "analyze_seconds": analyze_time,
+        "total_seconds": load_time + analyze_time,
+        "python_loop_seconds": python_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time status_analytics on a synthetic year of CE/EM history.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--listed", type=int, default=5000, help="tickers listed per source on day one")
+    parser.add_argument("--entries-per-day", type=int, default=40)
+    args = parser.parse_args()
+    r = run(args.days, args.listed, args.entries_per_day)
+    print(f"{r['intervals']} intervals over {r['days']} days")
+    print(f"  load (SQLite -> DataFrame) : {r['load_seconds'] * 1000:8.1f} ms")
+    print(f"  analyze (vectorized)       : {r['analyze_seconds'] * 1000:8.1f} ms")
+    print(f"  total                      : {r['total_seconds'] * 1000:8.1f} ms")
+    print(f"  python loop (dwell+churn)  : {r['python_loop_seconds'] * 1000:8.1f} ms")
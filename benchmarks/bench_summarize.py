@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import FakeLLMClient
+from summarizer import summarize_text
+from summary_cache import SummaryCache
+from summary_pipeline import SummaryPipeline
+
+
+def make_items(count, duplicates=0.2):
+    """(ticker, text, payload) tuples as the scanner queues them; a `duplicates` fraction repeats earlier text."""
+    unique = max(1, int(count * (1 - duplicates)))
+    items = []
+    for i in range(count):
+        n = i if i < unique else i % unique
+        ticker = f"T{n % 500:04d}"
+        items.append((ticker, f"{ticker} announces update {n}. Revenue rose {n % 97}% on new contracts.", {}))
+    return items
+
+
+def sequential(items, client, cache):
+    """The pre-pipeline loop: one summarize_text call per item."""
+    return [summarize_text(text, ticker, client, cache) for ticker, text, _ in items]
+
+
+def pipelined(items, client, cache, workers):
+    pipeline = SummaryPipeline(client=client, cache=cache, max_workers=workers, rpm=10 ** 6, tpm=10 ** 9)
+    return list(pipeline.run(items))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(items=200, latency=0.05, workers=8):
+    """Summarize `items` news items with a fake LLM answering in `latency` seconds; returns timings."""
+    news = make_items(items)
+    with tempfile.TemporaryDirectory() as workdir:
+        client = FakeLLMClient(latency=latency)
+        cache = SummaryCache(os.path.join(workdir, "sequential.db"))
+        sequential_time = timed(sequential, news, client, cache)
+        sequential_calls = client.calls
+        cache.close()
+
+        client = FakeLLMClient(latency=latency)
+        cache = SummaryCache(os.path.join(workdir, "pipeline.db"))
+        tracemalloc.start()
+        cold_time = timed(pipelined, news, client, cache, workers)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cold_calls = client.calls
+        warm_time = timed(pipelined, news, client, cache, workers)
+        warm_calls = client.calls - cold_calls
+        cache.close()
+    return {
+        "items": items,
+        "latency_seconds": latency,
+        "workers": workers,
+        "sequential_seconds": sequential_time,
+        "sequential_llm_calls": sequential_calls,
+        "pipeline_cold_seconds": cold_time,
+        "pipeline_cold_llm_calls": cold_calls,
+        "pipeline_cold_peak_bytes": peak,
+        "pipeline_warm_seconds": warm_time,
+        "pipeline_warm_llm_calls": warm_calls,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the sequential summarize loop with SummaryPipeline.")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM response time in seconds")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    r = run(args.items, args.latency, args.workers)
+    print(f"{r['items']} items, {r['latency_seconds'] * 1000:.0f} ms per LLM call")
+    for key in ("sequential", "pipeline_cold", "pipeline_warm"):
+        seconds = r[f"{key}_seconds"]
+        print(f"  {key:14}: {seconds:6.2f} s  {r['items'] / seconds:8.1f} items/s  {r[f'{key}_llm_calls']:4d} calls")
+    print(f"  pipeline peak memory: {r['pipeline_cold_peak_bytes'] / 1e6:.2f} MB")
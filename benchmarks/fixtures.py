@@ -0,0 +1,329 @@
+import ftplib
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLIANCE_HEADER = ("Symbol|Security Name|Market Name|OTC Tier ID|Caveat Emptor|Shell Risk|Promotion|"
+                     "Delinquent SEC Reporting|Bankruptcy|Reverse Split|Name Change|Proprietary Quote Eligible|Date")
+
+
+def make_compliance_file(rows, seed=42, day=0, churn=0.0):
+    """Return the bytes of a synthetic compliance file with `rows` data rows.
+
+    Each row's CE/EM flags are fixed by seed; for day > 0 a `churn` fraction of
+    rows flip their flags, so consecutive days produce entries and exits.
+    """
+    rng = random.Random(seed)
+    day_rng = random.Random(seed * 1000 + day)
+    lines = [COMPLIANCE_HEADER]
+    for i in range(rows):
+        tier = rng.choice(["10", "20", "21", "22", "40", "40"])
+        ce = "Y" if rng.random() < 0.1 else "N"
+        flags = "|".join(rng.choice("YN") for _ in range(6))
+        if day and day_rng.random() < churn:
+            tier = "21" if tier == "40" else "40"
+            ce = "N" if ce == "Y" else "Y"
+        lines.append(f"T{i:05d}|Synthetic Holdings {i} Inc|OTC Market|{tier}|{ce}|{flags}|Y|2026-10-16")
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+def make_rss(ticker, items=5):
+    """Return a small RSS 2.0 document with `items` entries for ticker."""
+    entries = "".join(
+        f"<item><title>{ticker} announces update {i}</title>"
+        f"<link>https://example.com/{ticker}/{i}</link>"
+        f"<description>{ticker} press release number {i}.</description>"
+        f"<pubDate>Fri, {10 + i:02d} Oct 2026 13:00:00 GMT</pubDate></item>"
+        for i in range(items)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>{ticker} news</title>'
+            f"{entries}</channel></rss>").encode()
+
+
+class StubServer:
+    """Local HTTP server for offline benchmarks.
+
+    Serves RSS feeds at /stock/<ticker>/news/rss and accepts Telegram Bot API
+    posts at /bot<token>/sendMessage. latency adds a fixed delay to every
+    response to stand in for a remote host. Feeds carry an ETag and conditional
+    requests are answered with 304. The first rate_limited Telegram posts get
+    a 429 with retry_after 0.
+    """
+
+    def __init__(self, latency=0.0, items=5, rate_limited=0):
+        self.latency = latency
+        self.items = items
+        self.rate_limited = rate_limited
+        self.requests = 0
+        self.not_modified = 0
+        self.telegram_messages = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Write headers and body in one segment so keep-alive clients
+            # don't stall on delayed ACKs
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = self.path.strip("/").split("/")
+                ticker = parts[1] if len(parts) > 1 else "TEST"
+                body = make_rss(ticker, server.items)
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.requests += 1
+                    limited = server.rate_limited > 0
+                    server.rate_limited -= limited
+                    if not limited:
+                        server.telegram_messages.append(body)
+                if limited:
+                    self._send_json(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0}})
+                else:
+                    self._send_json(200, {"ok": True, "result": {}})
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def rss_url_template(self):
+        return self.url + "/stock/{ticker}/news/rss"
+
+
+class FakeLLMClient:
+    """Stand-in for openai.OpenAI: client.chat.completions.create returns a canned summary.
+
+    latency is slept per call; calls counts how many requests reached the "LLM".
+    Batched prompts (a JSON item list) get a JSON array answer. The first
+    rate_limited calls raise openai.RateLimitError.
+    """
+
+    def __init__(self, latency=0.0, rate_limited=0):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            limited = self.rate_limited > 0
+            self.rate_limited -= limited
+        if limited:
+            import httpx
+            import openai
+            response = httpx.Response(429, headers={"retry-after": "0.01"},
+                                      request=httpx.Request("POST", "http://llm.invalid/v1/chat/completions"))
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        if "Items:" in prompt:
+            items = json.loads(prompt.split("Items:", 1)[1])
+            content = json.dumps([{"id": item["id"], "summary": f"Neutral. KEEP. ({item['ticker']})"}
+                                  for item in items])
+        else:
+            content = f"Neutral. KEEP. ({len(prompt)} chars summarized by {model})"
+        return _Namespace(choices=[_Namespace(message=_Namespace(content=content))],
+                          usage=_Namespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4))
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Event:
+    """The slice of eventkit.Event that ib_insync callers use: +=, -= and emit."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def emit(self, *args):
+        for handler in list(self.handlers):
+            handler(*args)
+
+
+class FakeIB:
+    """Stand-in for ib_insync.IB serving a fixed set of positions.
+
+    connect() sleeps `latency` like the TWS handshake and fails the first
+    fail_connects times. set_position() emits a positionEvent and drop()
+    simulates TWS going away.
+    """
+
+    def __init__(self, positions=None, latency=0.0, fail_connects=0):
+        self._positions = dict(positions or {})
+        self.latency = latency
+        self.fail_connects = fail_connects
+        self.connects = 0
+        self.client_ids = []
+        self._connected = False
+        self.positionEvent = _Event()
+
+    def connect(self, host, port, clientId=1, readonly=False, **kwargs):
+        self.connects += 1
+        self.client_ids.append(clientId)
+        if self.fail_connects > 0:
+            self.fail_connects -= 1
+            raise ConnectionRefusedError(f"Connect call failed ({host}, {port})")
+        time.sleep(self.latency)
+        self._connected = True
+
+    def isConnected(self):
+        return self._connected
+
+    def positions(self):
+        return [_position(symbol, qty) for symbol, qty in self._positions.items()]
+
+    def set_position(self, symbol, qty):
+        self._positions[symbol] = qty
+        self.positionEvent.emit(_position(symbol, qty))
+
+    def sleep(self, seconds):
+        time.sleep(min(seconds, 0.05))
+
+    def drop(self):
+        self._connected = False
+
+    def disconnect(self):
+        self._connected = False
+
+
+def _position(symbol, qty):
+    return _Namespace(contract=_Namespace(symbol=symbol), position=qty)
+
+
+class FakeFTPServer:
+    """In-memory stand-in for the OTC Markets FTP directory.
+
+    Pass server.connect as ComplianceFTPSession's ftp_factory; every connection
+    sees the same files dict (filename -> bytes). mlsd=False makes connections
+    answer MLSD with 500 so the NLST + SIZE/MDTM fallback is exercised.
+    """
+
+    def __init__(self, files=None, latency=0.0, mlsd=True, blocksize=8192):
+        self.files = dict(files or {})
+        self.modified = {name: "20261016120000" for name in self.files}
+        self.latency = latency
+        self.mlsd = mlsd
+        self.blocksize = blocksize
+        self.connects = 0
+        self.retrievals = 0
+
+    def put(self, name, data, modified="20261016120000"):
+        self.files[name] = data
+        self.modified[name] = modified
+
+    def connect(self, host, timeout=None):
+        self.connects += 1
+        time.sleep(self.latency)
+        return _FakeFTPConnection(self)
+
+
+class _FakeFTPConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def login(self):
+        pass
+
+    def cwd(self, directory):
+        pass
+
+    def mlsd(self, facts=None):
+        if not self.server.mlsd:
+            raise ftplib.error_perm("500 MLSD not understood")
+        for name, data in list(self.server.files.items()):
+            yield name, {"type": "file", "size": str(len(data)), "modify": self.server.modified[name]}
+
+    def nlst(self):
+        return list(self.server.files)
+
+    def voidcmd(self, cmd):
+        return "200 OK"
+
+    def size(self, filename):
+        return len(self._file(filename))
+
+    def sendcmd(self, cmd):
+        name = cmd.split(maxsplit=1)[1]
+        self._file(name)
+        return f"213 {self.server.modified[name]}"
+
+    def retrbinary(self, cmd, callback, blocksize=None):
+        data = self._file(cmd.split(maxsplit=1)[1])
+        self.server.retrievals += 1
+        time.sleep(self.server.latency)
+        blocksize = blocksize or self.server.blocksize
+        for start in range(0, len(data), blocksize):
+            callback(data[start:start + blocksize])
+        return "226 Transfer complete"
+
+    def _file(self, name):
+        try:
+            return self.server.files[name]
+        except KeyError:
+            raise ftplib.error_perm(f"550 {name}: No such file")
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+REGRESSION_THRESHOLD = 1.25  # flag timings that got this much slower than the baseline
+
+# bench module -> (quick params, full params)
+BENCHMARKS = {
+    "bench_monitor": ({"rows": 5000, "days": 5}, {}),
+    "bench_compliance_parser": ({"rows": 5000, "repeat": 2}, {}),
+    "bench_news_fetch": ({"tickers": 40}, {}),
+    "bench_news_merge": ({"tickers": 200}, {}),
+    "bench_summarize": ({"items": 50}, {}),
+    "bench_alerts": ({"alerts": 50}, {}),
+    "bench_dashboard": ({"tickers": 40, "requests": 50}, {}),
+    "bench_status_analytics": ({"days": 90, "listed": 1000, "repeat": 1}, {}),
+    "bench_portfolio": ({"latency": 0.1, "reads": 100}, {}),
+}
+
+
+def run_bench(name, params):
+    """Run one benchmark's run(**params) in a fresh interpreter and scratch directory; returns its dict."""
+    code = (f"import json, sys, {name}\n"
+            f"result = {name}.run(**{params!r})\n"
+            "sys.stdout.write('\\n' + json.dumps(result) + '\\n')")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([BENCH_DIR, ROOT]), MUTE_ALERTS="true")
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                              capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """{"bench.key.sub": number} for every numeric value."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def is_timing(key):
+    last = key.rsplit(".", 1)[-1]
+    return (last.endswith("_seconds") and "latency" not in last) or last in ("p50", "p95")
+
+
+def compare(current, previous):
+    """Print timings that moved by more than REGRESSION_THRESHOLD; returns the regressed keys."""
+    now, before = flatten(current["results"]), flatten(previous["results"])
+    regressions = []
+    for key in sorted(now):
+        if not is_timing(key) or not before.get(key):
+            continue
+        ratio = now[key] / before[key]
+        if ratio >= REGRESSION_THRESHOLD:
+            regressions.append(key)
+            print(f"  🔺 {key}: {before[key] * 1000:.2f} ms -> {now[key] * 1000:.2f} ms (x{ratio:.2f})")
+        elif ratio <= 1 / REGRESSION_THRESHOLD:
+            print(f"  🔻 {key}: {before[key] * 1000:.2f} ms -> {now[key] * 1000:.2f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every offline benchmark and save the results as JSON.")
+    parser.add_argument("--quick", action="store_true", help="small inputs, for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--no-save", action="store_true", help="do not write a result file")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="saved result to compare with; exits 1 if a timing regressed. "
+                             "Only compare runs from the same machine")
+    args = parser.parse_args()
+    mode = "quick" if args.quick else "full"
+
+    run = {
+        "mode": mode,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {},
+        "errors": {},
+    }
+    for name in args.only or BENCHMARKS:
+        params = BENCHMARKS[name][0 if args.quick else 1]
+        print(f"▶️ {name} {params or ''}")
+        start = time.perf_counter()
+        try:
+            run["results"][name] = run_bench(name, params)
+        except Exception as e:
+            print(f"  ❌ {e}")
+            run["errors"][name] = str(e)
+            continue
+        print(f"  ✅ {time.perf_counter() - start:.1f}s")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {os.path.basename(args.baseline)} ({baseline.get('git_revision')}):")
+        if baseline.get("mode") != mode:
+            print(f"  ⚠️ the baseline is a {baseline.get('mode')} run; sizes differ, so timings are not comparable")
+        regressions = compare(run, baseline)
+        if not regressions:
+            print("  no timing regressed by more than "
+                  f"{(REGRESSION_THRESHOLD - 1) * 100:.0f}%")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{mode}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"\n💾 Saved {os.path.relpath(path, ROOT)}")
+    return 1 if run["errors"] or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,15 @@
-import ftplib
-import io
-import sqlite3
+import argparse
+import os
 import logging
+import signal
+import threading
 from datetime import datetime, timedelta
-from alert_utils import send_alert
+from alert_utils import send_alert, flush_alerts
+from compliance_parser import ComplianceParser
+from ftp_session import ComplianceFTPSession, FTP_HOST, FTP_DIR
+from metrics import metrics, observe, span
+import status_db
+from watched import alert_newly_watched, alert_priority, get_watched
 
 # Setup logging to a file
 logging.basicConfig(
@@ -12,158 +18,242 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-DB_PATH = "otc_status.db"
-FTP_HOST = "ftp.otcmarkets.com"
-FTP_DIR = "Compliance-Data"
+FILE_SUFFIXES = ["-AM.txt", "-PM.txt"]
+BACKFILL_DAYS = int(os.getenv("BACKFILL_DAYS", "7"))
+HISTORY_DAYS = int(os.getenv("HISTORY_DAYS", "365"))
+SOURCES = ["Caveat Emptor", "Expert Market"]
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "300"))  # seconds between FTP listings in --daemon mode
+ALERT_ALL_CHANGES = os.getenv("ALERT_ALL_CHANGES", "false").lower() == "true"  # alert on unwatched tickers too
 
-def fetch_ce_expert_tickers_for_date(date_str):
-    """Fetch CE and EM tickers for a specific date string 'YYYY-MM-DD' from FTP."""
-    for suffix in ["-AM.txt", "-PM.txt"]:
-        filename = f"compliance-data-{date_str}{suffix}"
+def compliance_filenames(date_str):
+    return [f"compliance-data-{date_str}{suffix}" for suffix in FILE_SUFFIXES]
+
+def select_compliance_file(date_str, available):
+    """Return the compliance file to use for date_str, or None if none was published.
+
+    The latest file of the day wins: once the PM file is out it supersedes the AM file.
+    """
+    for filename in reversed(compliance_filenames(date_str)):
+        if filename in available:
+            return filename
+    return None
+
+def download_compliance_file(filename, session):
+    """Download and parse one compliance file, returning (CE tickers, EM tickers)."""
+    # The parser consumes chunks as they arrive, so ftp_download includes compliance_parse
+    with span("ftp_download"):
+        parser = session.retrieve(filename, ComplianceParser).close()
+    observe("compliance_parse", parser.parse_seconds)
+    return parser.ce_em()
+
+def fetch_ce_expert_tickers_for_date(date_str, session=None):
+    """Fetch CE and EM tickers for a specific date string 'YYYY-MM-DD' from FTP.
+
+    Pass an open ComplianceFTPSession to reuse its connection and directory
+    listing; otherwise a session is opened just for this call.
+    """
+    if session is None:
+        with ComplianceFTPSession() as own_session:
+            return fetch_ce_expert_tickers_for_date(date_str, own_session)
+
+    try:
+        available = session.list_files()
+    except Exception as e:
+        logging.warning(f"Failed to list {FTP_DIR} on {FTP_HOST}: {e}")
+        return set(), set()
+
+    for filename in reversed(compliance_filenames(date_str)):
+        if filename not in available:
+            continue
         try:
-            with ftplib.FTP(FTP_HOST) as ftp:
-                ftp.login()
-                ftp.cwd(FTP_DIR)
-                r = io.BytesIO()
-                ftp.retrbinary(f"RETR {filename}", r.write)
-                r.seek(0)
-                text = r.getvalue().decode("utf-8", errors="ignore")
-
-            ce = set()
-            em = set()
-            header, *lines = text.splitlines()
-            cols = header.split('|')
-            idx_sym = cols.index("Symbol")
-            idx_ce = cols.index("Caveat Emptor")
-            idx_tier = cols.index("OTC Tier ID")
-            for line in lines:
-                parts = line.split('|')
-                if len(parts) <= max(idx_sym, idx_ce, idx_tier):
-                    continue
-                sym = parts[idx_sym].strip()
-                if parts[idx_ce].strip() == 'Y':
-                    ce.add(sym)
-                if parts[idx_tier].strip() == '40':
-                    em.add(sym)
-
-            return ce, em
+            return download_compliance_file(filename, session)
         except Exception as e:
             logging.warning(f"Failed to retrieve {filename}: {e}")
+
+    logging.info(f"No compliance file published for {date_str}")
     return set(), set()
 
-def save_tickers_for_date(source, tickers, date_str):
+def is_ingested(manifest, filename, facts):
+    """True if filename was ingested before and the server copy has not changed since."""
+    if filename not in manifest:
+        return False
+    size, modified = manifest[filename]
+    if facts.get("size") is None and facts.get("modify") is None:
+        # Server gives no size/mtime; trust the earlier ingest
+        return True
+    return (size, modified) == (facts.get("size"), facts.get("modify"))
+
+def pending_compliance_file(date_str, session, manifest):
+    """Return (filename, facts) if date_str has a compliance file not yet ingested, else (None, None)."""
+    filename = select_compliance_file(date_str, session.list_files())
+    if filename is None:
+        return None, None
+    facts = session.file_facts(filename)
+    if is_ingested(manifest, filename, facts):
+        return None, None
+    return filename, facts
+
+def save_tickers_for_date(source, tickers, date_str, conn=None):
     """Save tickers for a given source and date if not already saved."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("CREATE TABLE IF NOT EXISTS tickers (source TEXT, ticker TEXT, date TEXT)")
-    # Check which tickers already saved
-    c.execute("SELECT ticker FROM tickers WHERE source=? AND date=?", (source, date_str))
-    existing = {row[0] for row in c.fetchall()}
-    to_insert = tickers - existing
-    if to_insert:
-        for ticker in to_insert:
-            c.execute("INSERT INTO tickers (source, ticker, date) VALUES (?, ?, ?)", (source, ticker, date_str))
-        conn.commit()
-    conn.close()
+    with status_db.open_db(conn) as db:
+        status_db.save_tickers(db, source, tickers, date_str)
+        if conn is None:
+            db.commit()
 
-def backfill_last_7_days():
-    """Fetch and save CE/Expert tickers for the last 7 days from FTP."""
-    logging.info("Starting 7-day backfill from FTP")
-    for offset in range(7):
+def backfill(days=BACKFILL_DAYS, session=None, skip_today=False, conn=None):
+    """Fetch and save CE/Expert tickers for the last `days` days from FTP.
+
+    Only files missing from the ingested_files manifest, or changed on the
+    server since they were ingested, are downloaded. Each file's tickers and
+    its manifest row are written in a single transaction. Returns False if
+    the listing or any download failed, so the caller can try again.
+    """
+    if session is None:
+        with ComplianceFTPSession() as own_session:
+            return backfill(days, own_session, skip_today, conn)
+    if conn is None:
+        with status_db.open_db() as own_conn:
+            return backfill(days, session, skip_today, own_conn)
+
+    logging.info(f"Starting {days}-day backfill from FTP")
+    try:
+        session.list_files()
+    except Exception as e:
+        logging.warning(f"Failed to list {FTP_DIR} on {FTP_HOST}: {e}")
+        return False
+
+    manifest = status_db.load_manifest(conn)
+    fetched = 0
+    failed = 0
+    stale_sources = set()
+    first_offset = 1 if skip_today else 0
+    for offset in range(days - 1, first_offset - 1, -1):
         date = (datetime.today() - timedelta(days=offset)).strftime("%Y-%m-%d")
-        ce, em = fetch_ce_expert_tickers_for_date(date)
-        save_tickers_for_date("Caveat Emptor", ce, date)
-        save_tickers_for_date("Expert Market", em, date)
-        logging.info(f"Backfilled {len(ce)} CE and {len(em)} EM tickers for {date}")
-
-def load_previous_tickers(source, date_str):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("CREATE TABLE IF NOT EXISTS tickers (source TEXT, ticker TEXT, date TEXT)")
-    c.execute("SELECT ticker FROM tickers WHERE source=? AND date<?", (source, date_str))
-    tickers = {row[0] for row in c.fetchall()}
-    conn.close()
-    return tickers
+        filename, facts = pending_compliance_file(date, session, manifest)
+        if filename is None:
+            continue
+        try:
+            ce, em = download_compliance_file(filename, session)
+        except Exception as e:
+            logging.warning(f"Failed to retrieve {filename}: {e}")
+            failed += 1
+            continue
+        with span("db_write", op="backfill"), conn:
+            for source, tickers in zip(SOURCES, (ce, em)):
+                if status_db.apply_snapshot(conn, source, tickers, date) is None:
+                    stale_sources.add(source)
+            status_db.record_ingested(conn, filename, date, facts)
+        fetched += 1
+        logging.info(f"Backfilled {len(ce)} CE and {len(em)} EM tickers for {date} from {filename}")
 
-def track_entries_and_exits(source_name, current, date_str):
+    # Files older than the newest applied snapshot can't be folded in
+    # incrementally; recompute those sources' intervals from history once.
+    for source in sorted(stale_sources):
+        with conn:
+            status_db.rebuild_intervals(conn, source)
+    logging.info(f"Backfill complete: {fetched} new or changed file(s) in the last {days} days, {failed} failed")
+    return failed == 0
+
+def backfill_last_7_days(session=None):
+    """Fetch and save CE/Expert tickers for the last 7 days from FTP."""
+    backfill(7, session)
+
+def record_entries_and_exits(conn, source_name, current, date_str):
+    """Fold current into the status intervals and store entries/exits; the caller commits.
+
+    Returns (entered, exited) as sorted lists.
+    """
     logging.info(f"Tracking entries and exits for {source_name} on {date_str}")
-    previous = load_previous_tickers(source_name, date_str)
-
-    exited = sorted(previous - current)
-    entered = sorted(current - previous)
-
-    save_tickers_for_date(source_name, current, date_str)
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS ce_expert_entries (
-            date TEXT, source TEXT, ticker TEXT
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS ce_expert_exits (
-            date TEXT, source TEXT, ticker TEXT
-        )
-    """)
-
-    # Avoid duplicate inserts
-    c.execute("SELECT date, source, ticker FROM ce_expert_exits WHERE date=? AND source=?", (date_str, source_name))
-    existing_exits = {(row[0], row[1], row[2]) for row in c.fetchall()}
-    c.execute("SELECT date, source, ticker FROM ce_expert_entries WHERE date=? AND source=?", (date_str, source_name))
-    existing_entries = {(row[0], row[1], row[2]) for row in c.fetchall()}
-
-    for ticker in exited:
-        if (date_str, source_name, ticker) not in existing_exits:
-            c.execute("INSERT INTO ce_expert_exits (date, source, ticker) VALUES (?, ?, ?)", (date_str, source_name, ticker))
-    for ticker in entered:
-        if (date_str, source_name, ticker) not in existing_entries:
-            c.execute("INSERT INTO ce_expert_entries (date, source, ticker) VALUES (?, ?, ?)", (date_str, source_name, ticker))
-
-    conn.commit()
-    conn.close()
+    changes = status_db.apply_snapshot(conn, source_name, current, date_str)
+    if changes is None:
+        logging.warning(f"{date_str} is older than the latest {source_name} snapshot; rebuilding intervals")
+        status_db.rebuild_intervals(conn, source_name)
+        return [], []
+    return changes
 
-    if exited:
-        message = f"\U0001F6A8 {source_name} EXIT ALERT:\n" + "\n".join(exited)
-        print(message)
-        send_alert(f"{source_name} Exit", message)
-    if entered:
-        message = f"\u26A0\uFE0F {source_name} ENTRY ALERT:\n" + "\n".join(entered)
+def alert_entries_and_exits(source_name, entered, exited, watched=None):
+    """Alert on the entries/exits of held and watchlist tickers; held ones go out as high priority.
+
+    Other changes are only counted (and logged), unless ALERT_ALL_CHANGES is set.
+    """
+    watched = get_watched() if watched is None else watched
+    for kind, plural, icon, tickers in (("Exit", "exits", "\U0001F6A8", exited),
+                                        ("Entry", "entries", "\u26A0\uFE0F", entered)):
+        if not tickers:
+            continue
+        logging.info(f"{source_name} {plural}: {', '.join(tickers)}")
+        relevant = tickers if ALERT_ALL_CHANGES else [t for t in tickers if t in watched]
+        print(f"{icon} {source_name}: {len(tickers)} {plural}, {len(relevant)} to alert on")
+        if not relevant:
+            continue
+        message = f"{icon} {source_name} {kind.upper()} ALERT:\n" + "\n".join(
+            f"{t} ({watched[t]})" if t in watched else t for t in relevant)
         print(message)
-        send_alert(f"{source_name} Entry", message)
-
-def get_entries_and_exits_for_date(date):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT source, ticker FROM ce_expert_entries WHERE date=?", (date,))
-    entries = c.fetchall()
-    c.execute("SELECT source, ticker FROM ce_expert_exits WHERE date=?", (date,))
-    exits = c.fetchall()
-    conn.close()
-    return entries, exits
+        send_alert(f"{source_name} {kind}", message, alert_priority(relevant, watched))
+
+def track_entries_and_exits(source_name, current, date_str, conn=None):
+    with status_db.open_db(conn) as db:
+        with db:
+            entered, exited = record_entries_and_exits(db, source_name, current, date_str)
+    alert_entries_and_exits(source_name, entered, exited)
+
+def get_entries_and_exits_for_date(date, conn=None):
+    with status_db.open_db(conn) as db:
+        return status_db.get_entries_and_exits(db, date)
 
-def get_ce_expert_status_last_week():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+def get_ce_expert_status_last_week(conn=None):
     week_ago = (datetime.today() - timedelta(days=7)).strftime("%Y-%m-%d")
-    c.execute("SELECT DISTINCT source, ticker FROM tickers WHERE date >= ?", (week_ago,))
-    all_status = c.fetchall()
-    conn.close()
-    return all_status
+    with status_db.open_db(conn) as db:
+        return status_db.get_status_since(db, week_ago)
 
-def main():
-    logging.info("Starting CE/Expert tracking")
+def ingest_today(session, conn, today=None):
+    """Ingest today's compliance file if it is new or changed since the last ingest.
 
-    # Backfill last 7 days so DB has complete data
-    backfill_last_7_days()
+    Both sources, the manifest row and history pruning commit together; the
+    entry/exit alerts go out afterwards. Returns the ingested filename or None.
+    """
+    today = today or datetime.today().strftime("%Y-%m-%d")
+    try:
+        filename, facts = pending_compliance_file(today, session, status_db.load_manifest(conn))
+    except Exception as e:
+        logging.warning(f"Failed to list {FTP_DIR} on {FTP_HOST}: {e}")
+        return None
+    if filename is None:
+        return None
+    try:
+        ce_today, em_today = download_compliance_file(filename, session)
+    except Exception as e:
+        logging.warning(f"Failed to retrieve {filename}: {e}")
+        return None
 
-    # Now run today’s fetch and track entries/exits
+    with span("db_write", op="ingest"), conn:
+        ce_changes = record_entries_and_exits(conn, "Caveat Emptor", ce_today, today)
+        em_changes = record_entries_and_exits(conn, "Expert Market", em_today, today)
+        status_db.record_ingested(conn, filename, today, facts)
+        cutoff = (datetime.today() - timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d")
+        status_db.prune_history(conn, cutoff)
+    logging.info(f"Ingested {filename}: {len(ce_today)} CE and {len(em_today)} EM tickers")
+    watched = get_watched()
+    alert_entries_and_exits("Caveat Emptor", *ce_changes, watched=watched)
+    alert_entries_and_exits("Expert Market", *em_changes, watched=watched)
+    return filename
+
+def main(backfill_days=BACKFILL_DAYS):
+    logging.info("Starting CE/Expert tracking")
+    conn = status_db.connect()
     today = datetime.today().strftime("%Y-%m-%d")
-    ce_today, em_today = fetch_ce_expert_tickers_for_date(today)
-    track_entries_and_exits("Caveat Emptor", ce_today, today)
-    track_entries_and_exits("Expert Market", em_today, today)
 
-    entries, exits = get_entries_and_exits_for_date(today)
+    # One FTP session serves the backfill and today's download
+    with ComplianceFTPSession() as session:
+        # Backfill earlier days so DB has complete data
+        backfill(backfill_days, session, skip_today=True, conn=conn)
+
+        # Now fetch today's file, if it is new, and track entries/exits
+        if ingest_today(session, conn, today) is None:
+            logging.info(f"No new compliance file for {today}; nothing to track")
+    alert_newly_watched(conn)
+
+    entries, exits = get_entries_and_exits_for_date(today, conn)
 
     if entries:
         print("\n🆕 Entries Today:")
@@ -175,14 +265,98 @@ def main():
         for source, ticker in exits:
             print(f"  [{source}] {ticker}")
 
-    all_week = get_ce_expert_status_last_week()
+    all_week = get_ce_expert_status_last_week(conn)
+    conn.close()
     print("\n📅 Stocks listed in CE/Expert over the last 7 days:")
     for source, ticker in sorted(all_week):
         print(f"  [{source}] {ticker}")
 
     logging.info(f"Today's entries: {entries}")
     logging.info(f"Today's exits: {exits}")
+    flush_alerts()
     logging.info("Tracking completed successfully")
+    metrics.report("ce_expert_monitor")
+
+def install_stop_handlers(stop_event):
+    """Set stop_event on SIGINT/SIGTERM (and Ctrl+Break on Windows)."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    def handle(signum, frame):
+        logging.info(f"Received signal {signum}; stopping after the current poll")
+        stop_event.set()
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handle)
+
+def start_portfolio_feed():
+    """Run the IBKR portfolio feed in this process; returns it, or None if ib_insync is not installed."""
+    try:
+        from portfolio_source import get_default_source
+    except ImportError:
+        logging.warning("ib_insync is not installed; the portfolio snapshot will not be kept current")
+        return None
+    return get_default_source().start()
+
+def run_daemon(interval=POLL_INTERVAL, backfill_days=BACKFILL_DAYS, stop_event=None, portfolio_feed=True):
+    """Poll the FTP listing every `interval` seconds and ingest compliance files as they appear.
+
+    A file is processed when it is new or its size/mtime changed, so a re-published
+    file or the PM file after the AM file is picked up on the next poll. Earlier
+    days are backfilled at start-up and again after midnight, and on every poll
+    until none of their downloads fail. Runs until
+    stop_event is set (SIGINT/SIGTERM set it when called from the main thread).
+
+    With portfolio_feed the daemon also hosts the IBKR portfolio feed, which
+    keeps portfolio_snapshot.json current for the scanner and the watched-ticker alerts.
+    """
+    stop_event = stop_event or threading.Event()
+    install_stop_handlers(stop_event)
+    logging.info(f"Starting CE/Expert daemon, polling every {interval}s")
+    print(f"👀 Watching ftp://{FTP_HOST}/{FTP_DIR} every {interval}s (Ctrl+C to stop)")
+    conn = status_db.connect()
+    backfilled_for = None
+    portfolio = start_portfolio_feed() if portfolio_feed else None
+    try:
+        with ComplianceFTPSession() as session:
+            while not stop_event.is_set():
+                today = datetime.today().strftime("%Y-%m-%d")
+                try:
+                    session.list_files(refresh=True)
+                    # Repeated on every poll until no download fails; only missing files are fetched
+                    if backfilled_for != today and backfill(backfill_days, session, skip_today=True, conn=conn):
+                        backfilled_for = today
+                    filename = ingest_today(session, conn, today)
+                    alert_newly_watched(conn)
+                    if filename:
+                        print(f"📥 {datetime.now():%H:%M:%S} processed {filename}")
+                        flush_alerts()
+                        metrics.report(f"ce_expert_monitor daemon: {filename}")
+                        metrics.reset()
+                except Exception as e:
+                    logging.exception(f"Poll failed: {e}")
+                finally:
+                    # Servers drop idle control connections; log in again on the next poll
+                    session.close()
+                stop_event.wait(interval)
+    finally:
+        if portfolio is not None:
+            portfolio.stop()
+        conn.close()
+        flush_alerts()
+        logging.info("CE/Expert daemon stopped")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Track OTC Caveat Emptor / Expert Market entries and exits.")
+    parser.add_argument("--backfill-days", type=int, default=BACKFILL_DAYS,
+                        help=f"how many days of compliance files to keep ingested (default {BACKFILL_DAYS})")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and poll the FTP server for new or changed files")
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL,
+                        help=f"seconds between polls in --daemon mode (default {POLL_INTERVAL})")
+    parser.add_argument("--no-portfolio-feed", action="store_true",
+                        help="in --daemon mode, do not keep the IBKR portfolio snapshot current")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(args.interval, args.backfill_days, portfolio_feed=not args.no_portfolio_feed)
+    else:
+        main(args.backfill_days)
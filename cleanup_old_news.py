@@ -1,35 +1,30 @@
-import csv
-from datetime import datetime, timedelta
+import argparse
+import os
+from news_store import NewsStore, RETENTION_DAYS
 
 CSV_FILE = "news_summaries.csv"
-DAYS_TO_KEEP = 7  # Change this number as you want
 
-def cleanup_csv():
-    cutoff_date = datetime.now() - timedelta(days=DAYS_TO_KEEP)
-    rows_to_keep = []
+def cleanup_news(days_to_keep=RETENTION_DAYS):
+    store = NewsStore(retention_days=days_to_keep)
+    dropped = store.drop_expired()
+    store.close()
+    print(f"Cleanup done. Dropped {len(dropped)} day partition(s) older than {days_to_keep} days.")
 
-    try:
-        with open(CSV_FILE, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                # row[0] is date in YYYY-MM-DD format
-                try:
-                    row_date = datetime.strptime(row[0], "%Y-%m-%d")
-                    if row_date >= cutoff_date:
-                        rows_to_keep.append(row)
-                except Exception:
-                    # If date parsing fails, keep row to avoid accidental data loss
-                    rows_to_keep.append(row)
-    except FileNotFoundError:
-        print(f"{CSV_FILE} not found, nothing to clean.")
+def import_csv(path=CSV_FILE):
+    if not os.path.exists(path):
+        print(f"{path} not found, nothing to import.")
         return
-
-    # Rewrite CSV with filtered rows
-    with open(CSV_FILE, "w", newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows_to_keep)
-
-    print(f"Cleanup done. Kept {len(rows_to_keep)} rows newer than {DAYS_TO_KEEP} days.")
+    store = NewsStore()
+    added = store.import_csv(path)
+    store.close()
+    print(f"Imported {added} new rows from {path}.")
 
 if __name__ == "__main__":
-    cleanup_csv()
+    parser = argparse.ArgumentParser(description="Drop expired news from news_store.db.")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="days of news to keep")
+    parser.add_argument("--import-csv", nargs="?", const=CSV_FILE, metavar="PATH",
+                        help=f"first load rows from an old {CSV_FILE}")
+    args = parser.parse_args()
+    if args.import_csv:
+        import_csv(args.import_csv)
+    cleanup_news(args.days)
@@ -0,0 +1,93 @@
+import time
+
+SYMBOL_COLUMN = "Symbol"
+
+# flag name -> (column, values that set the flag)
+DEFAULT_FLAGS = {
+    "ce": ("Caveat Emptor", {"Y"}),
+    "em": ("OTC Tier ID", {"40"}),
+}
+
+
+class ComplianceParser:
+    """Streaming parser for the pipe-delimited compliance-data files.
+
+    Use it as the sink of ComplianceFTPSession.retrieve: bytes are consumed as
+    they arrive and only the needed columns are split out of each row.
+
+    flags maps a name to (column, accepted values) and collects the symbols whose
+    column matches into matches[name]. columns lists extra columns whose value is
+    kept per symbol in values[symbol][column], for flags we don't track yet.
+    """
+
+    def __init__(self, flags=None, columns=()):
+        self.flags = DEFAULT_FLAGS if flags is None else flags
+        self.columns = tuple(columns)
+        self.matches = {name: set() for name in self.flags}
+        self.values = {}
+        self.header = None
+        self.rows = 0
+        self.parse_seconds = 0.0  # time spent parsing, as opposed to waiting for the next chunk
+        self._tail = b""
+        self._flag_checks = None
+        self._value_indexes = None
+        self._maxsplit = None
+        self._idx_sym = None
+
+    def write(self, chunk):
+        start = time.perf_counter()
+        lines = (self._tail + chunk).split(b"\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+        self.parse_seconds += time.perf_counter() - start
+
+    def close(self):
+        """Flush a trailing line without a newline and return self."""
+        if self._tail:
+            self._feed_line(self._tail)
+            self._tail = b""
+        return self
+
+    def _read_header(self, line):
+        self.header = [col.strip() for col in line.decode("utf-8", errors="ignore").split("|")]
+        wanted = [SYMBOL_COLUMN] + [column for column, _ in self.flags.values()] + list(self.columns)
+        missing = [column for column in wanted if column not in self.header]
+        if missing:
+            raise ValueError(f"Compliance file is missing column(s): {', '.join(missing)}")
+        self._idx_sym = self.header.index(SYMBOL_COLUMN)
+        self._flag_checks = [
+            (self.header.index(column), {value.encode() for value in accepted}, self.matches[name])
+            for name, (column, accepted) in self.flags.items()
+        ]
+        self._value_indexes = [(column, self.header.index(column)) for column in self.columns]
+        # Split each row only as far as the right-most column we read
+        self._maxsplit = max(self.header.index(column) for column in wanted) + 1
+
+    def _feed_line(self, line):
+        line = line.rstrip(b"\r")
+        if self.header is None:
+            if line.strip():
+                self._read_header(line)
+            return
+        parts = line.split(b"|", self._maxsplit)
+        if len(parts) < self._maxsplit:
+            return
+        self.rows += 1
+        sym = None
+        for idx, accepted, matched in self._flag_checks:
+            if parts[idx].strip() in accepted:
+                if sym is None:
+                    sym = parts[self._idx_sym].strip().decode("utf-8", errors="ignore")
+                matched.add(sym)
+        if self._value_indexes:
+            if sym is None:
+                sym = parts[self._idx_sym].strip().decode("utf-8", errors="ignore")
+            self.values[sym] = {
+                column: parts[idx].strip().decode("utf-8", errors="ignore")
+                for column, idx in self._value_indexes
+            }
+
+    def ce_em(self):
+        """Return (CE tickers, EM tickers) for the default flags."""
+        return self.matches["ce"], self.matches["em"]
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import status_db
+from metrics import incr, span
+from otc_scraper import get_otc_news
+
+NEWS_TTL_MINUTES = float(os.getenv("DASHBOARD_NEWS_TTL_MINUTES", "30"))
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", "8"))
+ON_DEMAND_TIMEOUT = 10  # seconds a request waits for an uncached ticker
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NO_STATUS = ([], None)  # get_status value for a ticker never seen in CE/EM
+
+
+def paginate(items, cursor=None, limit=PAGE_SIZE, key=None):
+    """Return (page, next_cursor) for a list.
+
+    With key, items are ordered by key(item) and the cursor is the last key
+    returned, so pages stay stable while items are added; without it the
+    cursor is a plain offset. next_cursor is None on the last page. Raises
+    ValueError for a limit or offset cursor that is not a whole number.
+    """
+    try:
+        limit = max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    if key is None:
+        try:
+            start = int(cursor or 0)
+        except ValueError:
+            start = -1
+        if start < 0:
+            raise ValueError("cursor must be a next_cursor from an earlier page")
+        page = items[start:start + limit]
+        return page, str(start + limit) if start + limit < len(items) else None
+    items = sorted(items, key=key)
+    if cursor:
+        items = [item for item in items if key(item) > cursor]
+    page = items[:limit]
+    return page, key(page[-1]) if len(items) > limit else None
+
+
+class DashboardService:
+    """Thread-safe news and CE/EM status source for the Flask dashboard.
+
+    News is served stale-while-revalidate: a cached entry is returned at once
+    and refreshed in the background once older than ttl_minutes. Concurrent
+    requests for the same ticker share one fetch.
+    """
+
+    def __init__(self, fetch=get_otc_news, ttl_minutes=NEWS_TTL_MINUTES, max_workers=DASHBOARD_WORKERS):
+        self.fetch = fetch
+        self.ttl = ttl_minutes * 60
+        self._entries = {}  # ticker -> (news, fetched_at)
+        self._inflight = {}  # ticker -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard")
+
+    def _refresh_async(self, ticker):
+        with self._lock:
+            future = self._inflight.get(ticker)
+            if future is None:
+                future = self._inflight[ticker] = self._pool.submit(self._refresh, ticker)
+            return future
+
+    def _refresh(self, ticker):
+        try:
+            with span("dashboard_refresh"):
+                news = self.fetch(ticker)
+            with self._lock:
+                self._entries[ticker] = (news, time.monotonic())
+            return news
+        except Exception as e:
+            print(f"Error updating {ticker}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(ticker, None)
+
+    def get_news(self, ticker, timeout=ON_DEMAND_TIMEOUT):
+        """News for ticker. Cached news is returned immediately (and revalidated if stale);
+        an uncached ticker is fetched on demand, waiting at most timeout seconds."""
+        with self._lock:
+            entry = self._entries.get(ticker)
+        if entry is not None:
+            news, fetched_at = entry
+            stale = time.monotonic() - fetched_at > self.ttl
+            incr("dashboard_cache_lookups", result="stale" if stale else "hit")
+            if stale:
+                self._refresh_async(ticker)
+            return news
+        incr("dashboard_cache_lookups", result="miss")
+        future = self._refresh_async(ticker)
+        if not timeout:
+            return []
+        try:
+            return future.result(timeout)
+        except Exception:
+            return []
+
+    def cached_news(self, tickers):
+        """{ticker: news} from the cache only; never waits on the network."""
+        with self._lock:
+            return {ticker: self._entries[ticker][0] if ticker in self._entries else [] for ticker in tickers}
+
+    def refresh(self, tickers):
+        """Refresh tickers concurrently in the background; returns their futures."""
+        return [self._refresh_async(ticker) for ticker in tickers]
+
+    def refresh_and_wait(self, tickers):
+        for future in self.refresh(tickers):
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    def get_status(self, tickers):
+        """{ticker: ([(source, entered_date), ...], last_change)} from the status index."""
+        with status_db.open_db() as conn:
+            return status_db.get_ticker_status(conn, tickers)
+
+    def get_changes(self, date_str=None):
+        """(entries, exits) for date_str, default today."""
+        date_str = date_str or datetime.today().strftime("%Y-%m-%d")
+        with status_db.open_db() as conn:
+            return status_db.get_entries_and_exits(conn, date_str)
+
+    def get_status_last_week(self):
+        week_ago = (datetime.today() - timedelta(days=7)).strftime("%Y-%m-%d")
+        with status_db.open_db() as conn:
+            return status_db.get_status_since(conn, week_ago)
+
+    def get_analytics(self, source=None, within=None):
+        """status_analytics.analyze() over the full interval history."""
+        import status_analytics  # pandas is loaded only once analytics are requested
+        with status_db.open_db() as conn:
+            return status_analytics.get_analytics(conn, source, within=within or status_analytics.COHORT_DAYS)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+from sqlite_cache import SQLiteCache, default_cache
+
+FEED_CACHE_PATH = os.getenv("FEED_CACHE_PATH", "feed_cache.db")
+FEED_CACHE_TTL_HOURS = float(os.getenv("FEED_CACHE_TTL_HOURS", "168"))
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "5000"))
+
+
+class FeedCache(SQLiteCache):
+    """Persistent per-feed cache of validators (ETag/Last-Modified) and parsed entries.
+
+    Entries not refreshed within ttl_hours are dropped, and beyond max_entries the
+    least recently used feeds go first. Safe to share between fetch threads.
+    """
+
+    table = "feeds"
+    columns = "etag TEXT, last_modified TEXT, entries TEXT"
+    stamp_column = "fetched_at"
+
+    def __init__(self, path=FEED_CACHE_PATH, ttl_hours=FEED_CACHE_TTL_HOURS, max_entries=FEED_CACHE_MAX_ENTRIES):
+        super().__init__(path, ttl_hours * 3600, max_entries)
+
+    def get(self, key):
+        """Return (etag, last_modified, entries) for key, or None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, entries, fetched_at FROM feeds WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[3]):
+                self._conn.execute("DELETE FROM feeds WHERE key=?", (key,))
+                self._conn.commit()
+                return None
+            self._touch(key)
+        return row[0], row[1], json.loads(row[2])
+
+    def put(self, key, etag, last_modified, entries):
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO feeds (key, etag, last_modified, entries, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (key, etag, last_modified, json.dumps(entries), now, now))
+
+    def touch(self, key):
+        """Mark key as revalidated (the server answered 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE feeds SET fetched_at=?, accessed_at=? WHERE key=?", (now, now, key))
+            self._conn.commit()
+
+
+def get_default_cache():
+    """Process-wide FeedCache, opened on first use."""
+    return default_cache(FeedCache)
@@ -0,0 +1,138 @@
+import ftplib
+import logging
+import time
+
+from metrics import incr, span
+
+FTP_HOST = "ftp.otcmarkets.com"
+FTP_DIR = "Compliance-Data"
+FTP_TIMEOUT = 30
+FTP_RETRIES = 3
+RETRY_DELAY = 2  # seconds, doubled after each failed attempt
+
+# Errors that mean the connection is gone and a fresh login may succeed.
+# ftplib.error_perm (e.g. "550 file not found") is deliberately not in here.
+TRANSIENT_ERRORS = (ftplib.error_temp, ftplib.error_reply, ftplib.error_proto, OSError, EOFError)
+
+
+class ComplianceFTPSession:
+    """A single logged-in FTP connection to the compliance-data directory.
+
+    Open it once per run and reuse it for every listing and download; a dropped
+    connection is re-established transparently on the next call.
+    """
+
+    def __init__(self, host=FTP_HOST, directory=FTP_DIR, timeout=FTP_TIMEOUT,
+                 retries=FTP_RETRIES, ftp_factory=ftplib.FTP):
+        self.host = host
+        self.directory = directory
+        self.timeout = timeout
+        self.retries = retries
+        self._ftp_factory = ftp_factory
+        self._ftp = None
+        self._listing = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def connect(self):
+        ftp = self._ftp_factory(self.host, timeout=self.timeout)
+        ftp.login()
+        ftp.cwd(self.directory)
+        self._ftp = ftp
+        logging.info(f"Connected to ftp://{self.host}/{self.directory}")
+
+    def close(self):
+        if self._ftp is None:
+            return
+        try:
+            self._ftp.quit()
+        except Exception:
+            self._ftp.close()
+        self._ftp = None
+
+    def _drop(self):
+        if self._ftp is not None:
+            try:
+                self._ftp.close()
+            except Exception:
+                pass
+        self._ftp = None
+
+    def _call(self, operation, description):
+        """Run operation(ftp), reconnecting and retrying on transient failures."""
+        delay = RETRY_DELAY
+        for attempt in range(1, self.retries + 1):
+            try:
+                if self._ftp is None:
+                    self.connect()
+                return operation(self._ftp)
+            except TRANSIENT_ERRORS as e:
+                self._drop()
+                incr("ftp_retries")
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"FTP {description} failed (attempt {attempt}/{self.retries}): {e}; reconnecting")
+                time.sleep(delay)
+                delay *= 2
+
+    def list_files(self, refresh=False):
+        """Return {filename: facts} for the directory, listing it only once per session.
+
+        facts holds the MLSD 'size' and 'modify' values when the server supports
+        MLSD, and is empty otherwise.
+        """
+        if self._listing is None or refresh:
+            with span("ftp_list"):
+                self._listing = self._call(self._list, "listing")
+        return self._listing
+
+    def _list(self, ftp):
+        try:
+            return {name: facts for name, facts in ftp.mlsd(facts=["size", "modify", "type"])
+                    if facts.get("type", "file") == "file"}
+        except ftplib.error_perm:
+            pass
+        try:
+            return {name: {} for name in ftp.nlst()}
+        except ftplib.error_perm:
+            # Some servers answer an empty directory with "550 No files found"
+            return {}
+
+    def file_facts(self, filename):
+        """Return the listing facts for filename with 'size' and 'modify' filled in.
+
+        Servers without MLSD are asked with SIZE/MDTM, once per file per session.
+        Returns None when the file is not in the listing.
+        """
+        facts = self.list_files().get(filename)
+        if facts is None:
+            return None
+        if "size" not in facts or "modify" not in facts:
+            def stat(ftp):
+                ftp.voidcmd("TYPE I")
+                size = ftp.size(filename)
+                modified = ftp.sendcmd(f"MDTM {filename}").split()[-1]
+                return {"size": str(size), "modify": modified}
+            try:
+                facts.update(self._call(stat, f"SIZE/MDTM {filename}"))
+            except ftplib.error_perm as e:
+                logging.info(f"Server has no size/mtime for {filename}: {e}")
+                facts.setdefault("size", None)
+                facts.setdefault("modify", None)
+        return facts
+
+    def retrieve(self, filename, sink_factory):
+        """Download filename into a fresh sink_factory() object and return it.
+
+        The sink only needs a write(bytes) method. A new sink is created for each
+        attempt so a retried transfer never sees a partial earlier download.
+        """
+        def download(ftp):
+            sink = sink_factory()
+            ftp.retrbinary(f"RETR {filename}", sink.write)
+            return sink
+        return self._call(download, f"RETR {filename}")
@@ -1,7 +1,12 @@
 
+import os
 import logging
 from ib_insync import IB
 
+IBKR_HOST = os.getenv("IBKR_HOST", "127.0.0.1")
+IBKR_PORT = int(os.getenv("IBKR_PORT", "7497"))
+IBKR_CLIENT_ID = int(os.getenv("IBKR_CLIENT_ID", "1"))  # must be unique per simultaneous API connection
+
 class IBKRConnectionError(Exception):
     pass
 
@@ -17,10 +22,11 @@ def setup_logger(log_file='ibkr_api.log'):
 
 logger = setup_logger()
 
-def connect_ibkr(read_only=True, host='127.0.0.1', port=7497, client_id=1):
-    ib = IB()
+def connect_ibkr(read_only=True, host=IBKR_HOST, port=IBKR_PORT, client_id=IBKR_CLIENT_ID, ib=None):
+    """Connect ib (a new IB() by default) and return it; raises IBKRConnectionError on failure."""
+    ib = ib or IB()
     try:
-        ib.connect(host, port, clientId=client_id)
+        ib.connect(host, port, clientId=client_id, readonly=read_only)
         logger.info(f"Connected to IBKR API at {host}:{port} with clientId={client_id}")
     except Exception as e:
         logger.error(f"Failed to connect to IBKR API: {e}")
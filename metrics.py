@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_LOG_FILE = os.getenv("METRICS_LOG_FILE", "metrics.log")
+METRICS_PREFIX = "otc_"
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """Thread-safe counters and timing spans for one process.
+
+    Timings keep count, total and max seconds per (name, labels); counters keep
+    a running total. Both are cheap enough to record on every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}  # (name, labels) -> total
+        self.timings = {}  # (name, labels) -> [count, total seconds, max seconds]
+
+    def incr(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timing = self.timings.get(key)
+            if timing is None:
+                self.timings[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the with-block as one observation of name; failures get error="1"."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - start, error="1", **labels)
+            raise
+        self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.started = time.time()
+
+    def summary_table(self):
+        """Plain-text table of every span and counter recorded so far."""
+        with self._lock:
+            timings = sorted((name, labels, list(t)) for (name, labels), t in self.timings.items())
+            counters = sorted((name, labels, value) for (name, labels), value in self.counters.items())
+        lines = [f"{'span':<44} {'count':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+        for name, labels, (count, total, longest) in timings:
+            lines.append(f"{_label_name(name, labels):<44} {count:7d} {total:9.2f} "
+                         f"{total / count * 1000:9.1f} {longest * 1000:9.1f}")
+        if counters:
+            lines.append(f"{'counter':<44} {'value':>7}")
+            for name, labels, value in counters:
+                lines.append(f"{_label_name(name, labels):<44} {value:7g}")
+        return "\n".join(lines)
+
+    def prometheus_text(self):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        with self._lock:
+            timings = sorted((name, labels, list(t)) for (name, labels), t in self.timings.items())
+            counters = sorted((name, labels, value) for (name, labels), value in self.counters.items())
+        # Each metric family is one contiguous block: its TYPE line, then all its samples
+        lines = []
+        summaries = {}
+        for name, labels, timing in timings:
+            summaries.setdefault(_metric_name(name) + "_seconds", []).append((labels, timing))
+        for metric, samples in summaries.items():
+            lines.append(f"# TYPE {metric} summary")
+            for labels, (count, total, _) in samples:
+                lines.append(f"{metric}_count{_prom_labels(labels)} {count}")
+                lines.append(f"{metric}_sum{_prom_labels(labels)} {total:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines.extend(f"{metric}_max{_prom_labels(labels)} {longest:.6f}" for labels, (_, _, longest) in samples)
+        families = {}
+        for name, labels, value in counters:
+            families.setdefault(_metric_name(name) + "_total", []).append((labels, value))
+        for metric, samples in families.items():
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{_prom_labels(labels)} {value:g}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def report(self, run_name, path=METRICS_LOG_FILE):
+        """Print the summary table and append it to the metrics log; returns the table."""
+        table = self.summary_table()
+        elapsed = time.time() - self.started
+        header = f"=== {run_name} {datetime.now():%Y-%m-%d %H:%M:%S} ({elapsed:.1f}s) ==="
+        print(f"\n⏱️ {header}\n{table}")
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"{header}\n{table}\n\n")
+        return table
+
+
+def _label_name(name, labels):
+    return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+
+def _metric_name(name):
+    return METRICS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+metrics = Metrics()
+incr = metrics.incr
+observe = metrics.observe
+span = metrics.span
+report = metrics.report
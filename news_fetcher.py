@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+NEWS_CONCURRENCY = int(os.getenv("NEWS_CONCURRENCY", "16"))
+PER_HOST_RATE = float(os.getenv("NEWS_PER_HOST_RATE", "10"))  # requests per second per host, 0 = unlimited
+REQUEST_TIMEOUT = float(os.getenv("NEWS_REQUEST_TIMEOUT", "10"))  # seconds
+USER_AGENT = "Mozilla/5.0 (compatible; OTCStockScanner)"
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most `rate` per second, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class NewsFetcher:
+    """Pooled, rate-limited HTTP client plus a thread pool for fetching many tickers at once.
+
+    All workers share one requests.Session, so connections to a host are kept
+    alive and reused instead of being opened per feed.
+    """
+
+    def __init__(self, max_workers=NEWS_CONCURRENCY, per_host_rate=PER_HOST_RATE, timeout=REQUEST_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(per_host_rate)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url, **kwargs):
+        self.limiter.wait(url)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def map_as_completed(self, func, items):
+        """Run func(item) for every item concurrently and yield (item, result, error) as each finishes."""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="news") as pool:
+            futures = {pool.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_default_fetcher():
+    """Process-wide NewsFetcher, created on first use."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = NewsFetcher()
+        return _default_fetcher
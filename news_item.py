@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+NEAR_DUPLICATE_THRESHOLD = 0.6  # share of word bigrams two titles must have in common
+_WORD = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"[a-z0-9]*[0-9][a-z0-9]*")
+
+
+def parse_news_date(value):
+    """Parse an RSS/ISO date string (or datetime) to an aware UTC datetime, or None."""
+    if isinstance(value, datetime):
+        dt = value
+    elif not value:
+        return None
+    else:
+        value = str(value).strip()
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            try:
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class NewsItem:
+    """One news item from any source, with its date parsed once up front.
+
+    Supports item["title"] / item.get("summary") so code written against the
+    old dict records keeps working.
+    """
+
+    __slots__ = ("title", "headline", "link", "summary", "date", "source")
+
+    def __init__(self, title, link="", summary="", date=None, source="", headline=None):
+        self.title = title
+        self.headline = headline if headline is not None else title
+        self.link = link
+        self.summary = summary
+        self.date = date
+        self.source = source
+
+    @classmethod
+    def from_record(cls, record, source):
+        """Build an item from a scraper's dict, or None if its date can't be parsed."""
+        date = parse_news_date(record.get("date"))
+        if date is None:
+            return None
+        title = record.get("title", record.get("headline", "Untitled"))
+        return cls(
+            title=title,
+            link=record.get("link", ""),
+            summary=record.get("summary", "") or "",
+            date=date,
+            source=source,
+            headline=record.get("headline", title),
+        )
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"NewsItem({self.source}, {self.date:%Y-%m-%d}, {self.title!r})"
+
+
+def title_fingerprint(title):
+    """Return (normalized title, numbers in it, set of word bigrams) for near-duplicate matching.
+
+    Case, accents and punctuation are dropped, so "ACME Corp. Announces Q3 Results"
+    and "Acme Corp announces Q3 results" normalize to the same string.
+    """
+    if not title.isascii():
+        title = unicodedata.normalize("NFKD", title)
+    title = title.lower()
+    words = _WORD.findall(title)
+    shingles = set(zip(words, words[1:])) if len(words) > 1 else {tuple(words)}
+    return " ".join(words), frozenset(_NUMBER.findall(title)), shingles
+
+
+def merge_news(items, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Drop duplicate and near-duplicate titles (first one wins) and sort newest first.
+
+    Two titles are near-duplicates when they contain the same numbers and at
+    least `threshold` of their word bigrams overlap (Jaccard), which collapses
+    syndicated copies of one press release ("... | GlobeNewswire") while
+    keeping "Q2 results" and "Q3 results" apart. Candidates are found through
+    a bigram index, so this stays linear for the usual handful of matches.
+    """
+    seen = set()
+    kept = []  # (numbers, shingles) of each unique item
+    index = {}  # shingle -> positions in kept
+    unique = []
+    for item in items:
+        key, numbers, shingles = title_fingerprint(item.title)
+        if key in seen:
+            continue
+        candidates = {i for shingle in shingles for i in index.get(shingle, ())}
+        if any(kept[i][0] == numbers
+               and len(shingles & kept[i][1]) / len(shingles | kept[i][1]) >= threshold
+               for i in candidates):
+            continue
+        seen.add(key)
+        for shingle in shingles:
+            index.setdefault(shingle, []).append(len(kept))
+        kept.append((numbers, shingles))
+        unique.append(item)
+    unique.sort(key=lambda item: item.date, reverse=True)
+    return unique
+
+
+def news_to_dataframe(items):
+    """Return items as a pandas DataFrame, for bulk exports; pandas is imported only here."""
+    import pandas as pd
+    return pd.DataFrame([item.to_dict() for item in items])
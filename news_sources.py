@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import incr, span
+from news_item import NewsItem
+from otc_scraper import get_otc_news
+
+DEFAULT_SOURCES = [name.strip() for name in os.getenv("NEWS_SOURCES", "OTCMarkets").split(",") if name.strip()]
+SOURCE_TIMEOUT = float(os.getenv("NEWS_SOURCE_TIMEOUT", "15"))  # seconds one source may take per ticker
+SOURCE_WORKERS = int(os.getenv("NEWS_SOURCE_WORKERS", "16"))  # threads per source
+BREAKER_FAILURES = 3  # consecutive errors/timeouts that open a source's circuit
+BREAKER_COOLDOWN = 300  # seconds an open circuit skips the source before trying it again
+
+
+class NewsSource:
+    """A registered news source: fetch(ticker, fetcher) returns a list of record dicts.
+
+    Each source has its own timeout, result cache (cache_ttl seconds, 0 to
+    disable) and circuit breaker: after `failures` consecutive errors or
+    timeouts it is skipped for `cooldown` seconds, then one call is let
+    through to see whether it has recovered. Calls run on the source's own
+    `workers` threads, so a hung source cannot starve the others.
+    """
+
+    def __init__(self, name, fetch, timeout=SOURCE_TIMEOUT, cache_ttl=0, failures=BREAKER_FAILURES,
+                 cooldown=BREAKER_COOLDOWN, workers=SOURCE_WORKERS):
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.failures = failures
+        self.cooldown = cooldown
+        self.workers = workers
+        self._pool = None
+        self._cache = {}  # ticker -> (records, fetched_at)
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def cached(self, ticker):
+        if not self.cache_ttl:
+            return None
+        with self._lock:
+            entry = self._cache.get(ticker)
+        if entry is not None and time.monotonic() - entry[1] < self.cache_ttl:
+            return entry[0]
+        return None
+
+    def allow(self):
+        """False while the circuit is open; once the cooldown is over a single probe call is allowed."""
+        with self._lock:
+            if self._consecutive_failures < self.failures:
+                return True
+            if self._probing or time.monotonic() < self._open_until:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self, ticker, records):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probing = False
+            if self.cache_ttl:
+                self._cache[ticker] = (records, time.monotonic())
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probing = False
+            opened = self._consecutive_failures >= self.failures
+            if opened:
+                self._open_until = time.monotonic() + self.cooldown
+        if opened:
+            incr("news_source_circuit_open", source=self.name)
+            print(f"⚠️ {self.name} keeps failing; skipping it for {self.cooldown:g}s")
+
+    def call(self, ticker, fetcher):
+        with span("news_fetch", source=self.name):
+            return self.fetch(ticker, fetcher)
+
+    def submit(self, ticker, fetcher):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"news-{self.name}")
+        return self._pool.submit(self.call, ticker, fetcher)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_registry = {}  # name -> NewsSource
+
+
+def register_source(name, fetch, **options):
+    """Add (or replace) a news source; options are NewsSource's timeout, cache_ttl, failures, cooldown and workers.
+
+    fetch should raise on errors rather than return nothing, so the circuit breaker sees them.
+    """
+    previous = _registry.get(name)
+    _registry[name] = NewsSource(name, fetch, **options)
+    if previous is not None:
+        previous.close()
+    return _registry[name]
+
+
+def get_source(name):
+    return _registry[name]
+
+
+def source_names():
+    return list(_registry)
+
+
+def fetch_all(ticker, include_sources=None, fetcher=None, failed=None):
+    """Query the sources for ticker concurrently and return their NewsItems, unmerged.
+
+    include_sources defaults to DEFAULT_SOURCES; unknown names are ignored. A
+    source that errors, runs past its timeout or is skipped by its circuit
+    breaker contributes nothing, so the call takes about as long as the
+    slowest healthy source. Pass a list as failed to get those sources' names
+    appended to it.
+    """
+    failed = [] if failed is None else failed
+    sources = [_registry[name] for name in include_sources or DEFAULT_SOURCES if name in _registry]
+    results = {}
+    pending = []
+    for source in sources:
+        cached = source.cached(ticker)
+        if cached is not None:
+            incr("news_source_cache_hits", source=source.name)
+            results[source.name] = cached
+        elif source.allow():
+            future = source.submit(ticker, fetcher)
+            pending.append((source, future, time.monotonic() + source.timeout))
+        else:
+            incr("news_source_skipped", source=source.name)
+            failed.append(source.name)
+
+    for source, future, deadline in pending:
+        try:
+            records = future.result(max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            future.cancel()  # still queued if every one of the source's workers is busy
+            incr("news_source_timeouts", source=source.name)
+            print(f"⚠️ {source.name} timed out after {source.timeout:g}s for {ticker}")
+            source.record_failure()
+            failed.append(source.name)
+            continue
+        except Exception as e:
+            print(f"⚠️ Failed fetching from {source.name} for {ticker}: {e}")
+            source.record_failure()
+            failed.append(source.name)
+            continue
+        source.record_success(ticker, records)
+        results[source.name] = records
+
+    items = []
+    for source in sources:
+        for record in results.get(source.name, []):
+            item = NewsItem.from_record(record, source.name)
+            if item is not None:
+                items.append(item)
+    return items
+
+
+# Built-in sources. Merging keeps the first copy of a story, so list the most
+# authoritative source first in NEWS_SOURCES.
+register_source("OTCMarkets", lambda ticker, fetcher: get_otc_news(ticker, fetcher, raise_errors=True))
+
+try:
+    from yahoo_scraper import get_yahoo_news
+    register_source("YahooFinance", lambda ticker, fetcher: get_yahoo_news(ticker), cache_ttl=600)
+except ImportError:
+    pass
+
+try:
+    from reddit_scraper import get_reddit_mentions
+    register_source("Reddit", lambda ticker, fetcher: get_reddit_mentions(ticker), cache_ttl=600)
+except ImportError:
+    pass
+
+try:
+    from twitter_scraper import get_twitter_news
+    register_source("Twitter", lambda ticker, fetcher: get_twitter_news(ticker), timeout=30, cache_ttl=900)
+except ImportError:
+    pass
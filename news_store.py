@@ -0,0 +1,183 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+NEWS_STORE_PATH = os.getenv("NEWS_STORE_PATH", "news_store.db")
+RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", "7"))
+PARTITION_PREFIX = "news_"
+PARTITION_RE = re.compile(r"^news_(\d{8})$")
+SEEN_KEYS_KEPT = 50  # item keys remembered per ticker next to its high-water mark
+
+
+def item_key(title, link=""):
+    """Stable identity of a news item: its link when it has one, else its title."""
+    basis = (link or "").strip() or " ".join((title or "").lower().split())
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """Processed news items, partitioned into one SQLite table per day.
+
+    Each partition has a unique (ticker, item_key) index, so "already stored?"
+    is an index probe per live partition, and retention drops whole partitions
+    instead of rewriting the rest of the data.
+    """
+
+    def __init__(self, path=NEWS_STORE_PATH, retention_days=RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        # Per-ticker high-water mark: newest published time handled so far plus
+        # the keys of the most recent items, for items sharing that timestamp
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                ticker TEXT PRIMARY KEY, last_published TEXT, seen_keys TEXT
+            )
+        """)
+        self._conn.commit()
+        self._days = self._load_partitions()
+
+    def _load_partitions(self):
+        rows = self._conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'news_%'")
+        return sorted(match.group(1) for (name,) in rows if (match := PARTITION_RE.match(name)))
+
+    @staticmethod
+    def _table(day):
+        return PARTITION_PREFIX + day
+
+    def _ensure_partition(self, day):
+        if day in self._days:
+            return
+        table = self._table(day)
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                ticker TEXT NOT NULL, item_key TEXT NOT NULL, title TEXT, link TEXT,
+                summary TEXT, published TEXT, stored_at TEXT,
+                UNIQUE (ticker, item_key)
+            )
+        """)
+        self._days.append(day)
+        self._days.sort()
+
+    def contains(self, ticker, key):
+        """True if (ticker, key) is stored in any live partition."""
+        with self._lock:
+            for day in reversed(self._days):
+                if self._conn.execute(f"SELECT 1 FROM {self._table(day)} WHERE ticker=? AND item_key=?",
+                                      (ticker, key)).fetchone():
+                    return True
+            return False
+
+    def add(self, ticker, title, link="", summary="", published=None, day=None):
+        """Store one item under day (default today); returns False if it was already stored."""
+        key = item_key(title, link)
+        if self.contains(ticker, key):
+            return False
+        now = datetime.now()
+        day = (day or now.strftime("%Y-%m-%d")).replace("-", "")
+        if isinstance(published, datetime):
+            published = published.isoformat()
+        with self._lock:
+            self._ensure_partition(day)
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO {self._table(day)} "
+                "(ticker, item_key, title, link, summary, published, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ticker, key, title, link, summary, published, now.isoformat(timespec="seconds")))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def query(self, ticker=None, start=None, end=None, limit=None):
+        """Stored items as dicts, newest day first, optionally filtered by ticker and day range (YYYY-MM-DD)."""
+        start = start.replace("-", "") if start else None
+        end = end.replace("-", "") if end else None
+        rows = []
+        with self._lock:
+            for day in reversed(self._days):
+                if (start and day < start) or (end and day > end):
+                    continue
+                sql = f"SELECT ticker, title, link, summary, published, stored_at FROM {self._table(day)}"
+                params = ()
+                if ticker:
+                    sql += " WHERE ticker=?"
+                    params = (ticker,)
+                sql += " ORDER BY stored_at DESC"
+                for row in self._conn.execute(sql, params):
+                    rows.append({
+                        "date": f"{day[:4]}-{day[4:6]}-{day[6:]}", "ticker": row[0], "title": row[1],
+                        "link": row[2], "summary": row[3], "published": row[4], "stored_at": row[5],
+                    })
+                    if limit and len(rows) >= limit:
+                        return rows
+        return rows
+
+    def drop_expired(self, today=None):
+        """Drop partitions older than the retention window; returns the days dropped."""
+        today = today or datetime.now()
+        cutoff = (today - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        with self._lock:
+            expired = [day for day in self._days if day < cutoff]
+            for day in expired:
+                self._conn.execute(f"DROP TABLE IF EXISTS {self._table(day)}")
+                self._days.remove(day)
+            self._conn.commit()
+        return expired
+
+    def import_csv(self, path):
+        """Load rows from the old news_summaries.csv (Date, Ticker, Title, Summary); returns rows added."""
+        added = 0
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) < 4 or row[0] == "Date":
+                    continue
+                try:
+                    datetime.strptime(row[0], "%Y-%m-%d")
+                except ValueError:
+                    continue
+                added += self.add(row[1], row[2], summary=row[3], day=row[0])
+        return added
+
+    def get_watermark(self, ticker):
+        """Return (last published datetime or None, list of recently seen item keys) for ticker."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_published, seen_keys FROM watermarks WHERE ticker=?", (ticker,)).fetchone()
+        if row is None:
+            return None, []
+        last = datetime.fromisoformat(row[0]) if row[0] else None
+        return last, json.loads(row[1] or "[]")
+
+    def filter_new(self, ticker, items):
+        """Keep only items newer than ticker's high-water mark that haven't been seen yet.
+
+        items are NewsItem-like objects with title, link and an aware datetime date.
+        """
+        last, seen = self.get_watermark(ticker)
+        seen = set(seen)
+        return [item for item in items
+                if item_key(item.title, item.link) not in seen and (last is None or item.date >= last)]
+
+    def mark_seen(self, ticker, items):
+        """Advance ticker's high-water mark past items once they have been handled."""
+        if not items:
+            return
+        last, seen = self.get_watermark(ticker)
+        newest = max(item.date for item in items)
+        if last is None or newest > last:
+            last = newest
+        keys = [item_key(item.title, item.link) for item in items]
+        seen = (keys + [key for key in seen if key not in keys])[:SEEN_KEYS_KEPT]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks (ticker, last_published, seen_keys) VALUES (?, ?, ?)",
+                (ticker, last.isoformat(), json.dumps(seen)))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,12 +1,48 @@
 import feedparser
+from feed_cache import get_default_cache
+from news_fetcher import get_default_fetcher
+from metrics import incr
+
+OTC_NEWS_URL = "https://www.otcmarkets.com/stock/{ticker}/news/rss"
+
+def get_otc_news(ticker, fetcher=None, cache=None, raise_errors=False):
+    """News records from the ticker's OTC Markets RSS feed.
+
+    A ticker without a feed (404) has no news. Other fetch or parse errors
+    return [] unless raise_errors is set.
+    """
+    url = OTC_NEWS_URL.format(ticker=ticker)
+    fetcher = fetcher or get_default_fetcher()
+    cache = cache or get_default_cache()
+
+    # Revalidate the cached copy instead of downloading and parsing it again
+    cached = cache.get(ticker)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
 
-def get_otc_news(ticker):
-    url = f"https://www.otcmarkets.com/stock/{ticker}/news/rss"
     try:
-        feed = feedparser.parse(url)
+        response = fetcher.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            cache.touch(ticker)
+            incr("feed_requests", result="not_modified")
+            return cached[2]
+        if response.status_code == 404:
+            incr("feed_requests", result="not_found")
+            return []
+        response.raise_for_status()
+        feed = feedparser.parse(response.content)
     except Exception as e:
+        incr("feed_requests", result="error")
+        if raise_errors:
+            raise
         print(f"❌ Error parsing RSS feed for {ticker}: {e}")
         return []
+    incr("feed_requests", result="fetched")
     
     news_items = []
     for entry in feed.entries:
@@ -16,4 +52,5 @@ def get_otc_news(ticker):
             "summary": entry.get("summary", ""),
             "date": entry.get("published", "")
         })
+    cache.put(ticker, response.headers.get("ETag"), response.headers.get("Last-Modified"), news_items)
     return news_items
@@ -1,116 +1,407 @@
-from ibkr_connection import connect_ibkr, IBKRConnectionError
-from ce_expert_monitor import (
-    fetch_ce_expert_tickers,
-    track_entries_and_exits,
-    get_entries_and_exits_for_date
-)
-from scraper import get_all_news
-from summarizer import summarize_text
-from alert_utils import send_alert
+import argparse
+import multiprocessing
 import os
-import csv
-from datetime import datetime, timedelta
-
-CSV_FILE = "news_summaries.csv"
-MAX_AGE_DAYS = 7
-
-def clean_old_news():
-    if not os.path.exists(CSV_FILE):
-        return
-    rows = []
-    with open(CSV_FILE, "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from ibkr_connection import IBKRConnectionError
+from portfolio_source import PORTFOLIO_MAX_AGE, get_default_source as get_portfolio_source
+from ce_expert_monitor import SOURCES, ingest_today, get_entries_and_exits_for_date
+from ftp_session import ComplianceFTPSession
+import status_db
+from watched import alert_newly_watched
+from scraper import get_all_news
+from news_fetcher import NEWS_CONCURRENCY, PER_HOST_RATE, NewsFetcher, get_default_fetcher
+from summary_pipeline import LLM_BATCH_SIZE, LLM_CONCURRENCY, LLM_RPM, LLM_TPM, SummaryPipeline
+from alert_utils import send_alert, flush_alerts
+from news_store import NewsStore
+from scan_queue import CLAIM_BATCH, SCAN_QUEUE_PATH, ScanQueue
+from metrics import metrics, span
+
+NEW_ITEMS_PER_TICKER = 3
+QUEUE_SIZE = int(os.getenv("SCANNER_QUEUE_SIZE", "100"))  # items buffered between two stages
+PROGRESS_INTERVAL = 15  # seconds between progress lines in a sharded run
+STOP = object()
+
+
+class Stage:
+    """A pool of worker threads draining a bounded inbox.
+
+    handle(batch) is called with up to batch_size queued items and whatever it
+    returns is put on the outbox stage. put() blocks while the inbox is full,
+    so a slow stage holds back the stages feeding it.
+    """
+
+    def __init__(self, name, handle, workers=1, outbox=None, batch_size=1, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.handle = handle
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.inbox = queue.Queue(queue_size)
+        self.processed = 0
+        self.busy = 0.0  # seconds spent in handle(), summed over workers
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, item):
+        self.inbox.put(item)
+
+    def _next_batch(self):
+        batch = [self.inbox.get()]
+        while batch[-1] is not STOP and len(batch) < self.batch_size:
             try:
-                date = datetime.strptime(row[0], "%Y-%m-%d")
-                if datetime.now() - date <= timedelta(days=MAX_AGE_DAYS):
-                    rows.append(row)
-            except:
-                continue
-    with open(CSV_FILE, "w", newline='', encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
-
-def append_to_csv(row):
-    write_header = not os.path.exists(CSV_FILE)
-    with open(CSV_FILE, "a", newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        if write_header:
-            writer.writerow(["Date", "Ticker", "Title", "Summary"])
-        writer.writerow(row)
-
-try:
-    ib = connect_ibkr(read_only=True)
-except IBKRConnectionError as e:
-    print(e)
-    exit(1)
-
-try:
-    positions = ib.positions()
-    portfolio_tickers = list({pos.contract.symbol for pos in positions if pos.contract.symbol})
-    print(f"Portfolio tickers: {portfolio_tickers}")
-
-    combined_tickers = set(portfolio_tickers)
-
-    # Fetch current CE/Expert tickers live from OTC Markets FTP
+                batch.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is STOP
+            if stop:
+                batch.pop()
+            if batch:
+                start = time.perf_counter()
+                try:
+                    results = self.handle(batch) or []
+                except Exception as e:
+                    print(f"❌ {self.name} stage failed on {len(batch)} item(s): {e}")
+                    results = []
+                with self._lock:
+                    self.processed += len(batch)
+                    self.busy += time.perf_counter() - start
+                for result in results:
+                    self.outbox.put(result)
+            if stop:
+                return
+
+    def close(self):
+        """Let the workers finish everything queued so far, then stop them."""
+        for _ in self._threads:
+            self.inbox.put(STOP)
+        for thread in self._threads:
+            thread.join()
+
+
+def load_ce_expert_tickers():
+    """Ingest today's compliance file if it is new (tracking entries/exits and alerting on them)
+    and return the tickers currently in Caveat Emptor or Expert Market."""
+    today = datetime.today().strftime("%Y-%m-%d")
+    conn = status_db.connect()
     try:
-        ce_today, em_today = fetch_ce_expert_tickers()
+        with ComplianceFTPSession() as session:
+            ingest_today(session, conn, today)
+        alert_newly_watched(conn)
+        current = set()
+        for source in SOURCES:
+            current.update(status_db.get_open_tickers(conn, source))
+        entries, exits = get_entries_and_exits_for_date(today, conn)
+    finally:
+        conn.close()
+
+    print(f"Current CE/Expert tickers: {len(current)}")
+    print(f"CE/Expert Exits Today: {', '.join(sorted({t for _, t in exits})) or '[]'}")
+    print(f"CE/Expert Entries Today: {', '.join(sorted({t for _, t in entries})) or '[]'}")
+    return current
+
+
+class Scanner:
+    """Ticker sources -> news -> summarize -> store/alert, each stage with its own threads.
 
-        # Track entries and exits (updates DB and sends alerts)
-        track_entries_and_exits("Caveat Emptor", ce_today)
-        track_entries_and_exits("Expert Market", em_today)
+    The IBKR and FTP ticker sources run at the same time, and every stage
+    starts on the first item it receives, so a run takes about as long as its
+    slowest stage rather than the sum of all of them.
+    """
 
-        ce_expert_tickers = ce_today.union(em_today)
-        print(f"Current CE/Expert tickers (live): {sorted(ce_expert_tickers)}")
+    def __init__(self, news_store=None, pipeline=None, fetcher=None):
+        self.news_store = news_store or NewsStore()
+        self.pipeline = pipeline or SummaryPipeline()
+        self.fetcher = fetcher or get_default_fetcher()
+        self.unchanged = 0
+        self.unsummarized = 0
+        self._seen = set()
+        self._lock = threading.Lock()
 
-        # Get today's entries and exits from DB for reporting
-        today = datetime.today().strftime("%Y-%m-%d")
-        entries, exits = get_entries_and_exits_for_date(today)
+    def fetch_news(self, tickers, failed=None):
+        """News stage: keep only items past each ticker's high-water mark.
 
-        if exits:
-            exited_tickers = ", ".join(sorted({ticker for (_, ticker) in exits}))
-            print(f"CE/Expert Exits Today: {exited_tickers}")
-        else:
-            print("CE/Expert Exits Today: []")
+        Sources that could not be queried are appended to failed, if given.
+        """
+        to_summarize = []
+        for ticker in tickers:
+            news = get_all_news(ticker, fetcher=self.fetcher, failed=failed)
+            with span("db_read", op="filter_new"):
+                fresh = self.news_store.filter_new(ticker, news)
+            fresh = fresh[:NEW_ITEMS_PER_TICKER]
+            if not fresh:
+                with self._lock:
+                    self.unchanged += 1
+                continue
+            print(f"🔎 {ticker}\n" + "\n".join(f"  📰 {item['title']}" for item in fresh))
+            to_summarize.extend((ticker, item.get("summary") or "", item) for item in fresh)
+        return to_summarize
+
+    def deliver(self, results):
+        """Store each summarized item, advance the watermark and send its alert.
+
+        An item whose summary failed is left unseen, so the next run retries
+        it; returns how many were left.
+        """
+        failed = 0
+        for (ticker, text, item), summary_text in results:
+            if not text:
+                summary_text = "(No summary)"
+            elif not summary_text:
+                failed += 1
+                print(f"  ⚠️ {ticker} - {item['title']}: summary failed; retrying next run")
+                continue
+            print(f"  🧠 {ticker} - {item['title']}: {summary_text}")
+            with span("db_write", op="news_store"):
+                self.news_store.add(ticker, item["title"], item.get("link", ""), summary_text, item.get("date"))
+                self.news_store.mark_seen(ticker, [item])
+            send_alert(title=f"{ticker} - {item['title']}", message=summary_text)
+        if failed:
+            with self._lock:
+                self.unsummarized += failed
+        return failed
+
+    def report(self, results):
+        """Alert stage: deliver() each summarized item."""
+        self.deliver(results)
 
-        if entries:
-            entered_tickers = ", ".join(sorted({ticker for (_, ticker) in entries}))
-            print(f"CE/Expert Entries Today: {entered_tickers}")
-        else:
-            print("CE/Expert Entries Today: []")
+    def run(self):
+        start = time.perf_counter()
+        self.news_store.drop_expired()
+        alert_stage = Stage("alert", self.report)
+        summarize_stage = Stage("summarize", self.pipeline.summarize, LLM_CONCURRENCY, alert_stage, LLM_BATCH_SIZE)
+        news_stage = Stage("news", self.fetch_news, NEWS_CONCURRENCY, summarize_stage)
 
-        combined_tickers.update(ce_expert_tickers)
+        def submit(label, tickers):
+            with self._lock:
+                new = [t for t in tickers if t not in self._seen]
+                self._seen.update(new)
+            print(f"📈 {label}: {len(new)} new ticker(s) queued for news")
+            for ticker in new:
+                news_stage.put(ticker)
 
+        def ce_expert_source():
+            try:
+                with span("ticker_source", source="ce_expert"):
+                    tickers = load_ce_expert_tickers()
+                submit("CE/Expert", tickers)
+            except Exception as e:
+                print("⚠️ Failed loading or tracking CE/Expert tickers:", e)
+
+        ftp_thread = threading.Thread(target=ce_expert_source, name="ftp-source")
+        ftp_thread.start()
+        try:
+            with span("ticker_source", source="portfolio"):
+                portfolio_tickers = load_portfolio_tickers()
+            print(f"Portfolio tickers: {portfolio_tickers}")
+            submit("Portfolio", portfolio_tickers)
+        except IBKRConnectionError as e:
+            print(e)
+        except Exception as e:
+            print(f"❌ Failed loading portfolio positions: {e}")
+        ftp_thread.join()
+
+        for stage in (news_stage, summarize_stage, alert_stage):
+            stage.close()
+
+        if not self._seen:
+            print("❌ No tickers found.")
+            return 1
+        print(f"\n{self.unchanged} of {len(self._seen)} tickers have no new news.")
+        if self.unsummarized:
+            print(f"⚠️ {self.unsummarized} item(s) could not be summarized and will be retried next run.")
+        stats = self.pipeline.cache.stats()
+        print(f"🧠 Summary cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        print(f"⏱️ Finished in {time.perf_counter() - start:.1f}s")
+        for stage in (news_stage, summarize_stage, alert_stage):
+            print(f"  {stage.name:<10} {stage.processed:5d} item(s), {stage.busy:7.1f}s busy")
+        return 0
+
+
+def load_portfolio_tickers():
+    """Held symbols from the portfolio snapshot that the monitor daemon keeps current.
+
+    Only when there is no snapshot yet does this connect to TWS, once, to create it.
+    """
+    source = get_portfolio_source()
+    tickers = source.cached_tickers()
+    age = source.age()
+    if age is None:
+        try:
+            return source.get_portfolio_tickers(max_age=0)
+        finally:
+            source.stop()
+    if age > PORTFOLIO_MAX_AGE:
+        print(f"⚠️ Portfolio snapshot is {age / 60:.0f} minutes old; "
+              "run ce_expert_monitor.py --daemon to keep it current")
+    return tickers
+
+
+def load_universe():
+    """CE/Expert and portfolio tickers, for a sharded run."""
+    tickers = set()
+    try:
+        with span("ticker_source", source="ce_expert"):
+            tickers.update(load_ce_expert_tickers())
     except Exception as e:
         print("⚠️ Failed loading or tracking CE/Expert tickers:", e)
+    try:
+        with span("ticker_source", source="portfolio"):
+            portfolio_tickers = load_portfolio_tickers()
+        print(f"Portfolio tickers: {portfolio_tickers}")
+        tickers.update(portfolio_tickers)
+    except IBKRConnectionError as e:
+        print(e)
+    except Exception as e:
+        print(f"❌ Failed loading portfolio positions: {e}")
+    return tickers
 
-    if not combined_tickers:
-        print("❌ No tickers found.")
-        exit(1)
 
-    print(f"\n📈 Pulling news for {len(combined_tickers)} tickers...\n")
-    clean_old_news()
+def scan_worker(run_id, queue_path=SCAN_QUEUE_PATH, processes=1):
+    """Work through a sharded run's queue until it is empty; returns how many tickers this worker finished.
 
-    for ticker in combined_tickers:
-        print(f"🔎 {ticker}")
-        news = get_all_news(ticker, include_sources=["OTCMarkets"])
-        if not news:
-            print("  No news found.")
-            continue
+    Runs in each worker process. The LLM and per-host request budgets are
+    split evenly between the `processes` workers so that together they stay
+    within the configured limits.
+    """
+    work = ScanQueue(queue_path, run_id)
+    fetcher = NewsFetcher(per_host_rate=PER_HOST_RATE / processes)
+    scanner = Scanner(pipeline=SummaryPipeline(rpm=LLM_RPM / processes, tpm=LLM_TPM / processes), fetcher=fetcher)
 
-        for item in news[:3]:
-            print(f"  📰 {item['title']}")
-            summary_text = summarize_text(item.get("summary", ""), ticker=ticker) if item.get("summary") else "(No summary)"
-            print(f"  🧠 {summary_text}")
+    def process(ticker):
+        # News from the healthy sources is still delivered; the retry only finds what is left
+        failed = []
+        items = scanner.fetch_news([ticker], failed)
+        unsummarized = scanner.deliver(scanner.pipeline.summarize(items)) if items else 0
+        if failed:
+            raise RuntimeError(f"news source(s) unavailable: {', '.join(sorted(set(failed)))}")
+        if unsummarized:
+            raise RuntimeError(f"{unsummarized} item(s) could not be summarized")
 
-            append_to_csv([datetime.now().strftime("%Y-%m-%d"), ticker, item["title"], summary_text])
+    finished = 0
+    inflight = {}  # future -> ticker
+    drained = False
+    pool = ThreadPoolExecutor(max_workers=NEWS_CONCURRENCY, thread_name_prefix="scan")
+    try:
+        while True:
+            # Keep a few claimed tickers queued behind the busy threads
+            if not drained and len(inflight) < NEWS_CONCURRENCY:
+                claimed = work.claim(min(CLAIM_BATCH, 2 * NEWS_CONCURRENCY - len(inflight)))
+                drained = not claimed
+                for ticker in claimed:
+                    inflight[pool.submit(process, ticker)] = ticker
+            if not inflight:
+                break
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = inflight.pop(future)
+                error = future.exception()
+                if error is None:
+                    work.complete(ticker)
+                    finished += 1
+                else:
+                    print(f"❌ {ticker} failed: {error}")
+                    work.fail(ticker, error)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        work.release(list(inflight.values()))
+        work.close()
+        flush_alerts()
+        fetcher.close()
+        metrics.report(f"otc_stock_scanner worker {work.worker}")
+    return finished
+
+
+def print_progress(counts):
+    total = sum(counts.values())
+    print(f"📊 {counts.get('done', 0)}/{total} done, {counts.get('claimed', 0)} in progress, "
+          f"{counts.get('pending', 0)} pending, {counts.get('failed', 0)} failed")
+
+
+def run_sharded(processes, run_id=None, queue_path=SCAN_QUEUE_PATH, fresh=False, join=False):
+    """Scan the ticker universe with `processes` worker processes sharing a SQLite work queue.
+
+    Rerunning with the same run_id (default: today's date) resumes where an
+    interrupted run stopped and retries the tickers that failed. With join, no tickers are loaded; this machine
+    only helps work through a run started elsewhere on the same queue file.
+    """
+    start = time.perf_counter()
+    work = ScanQueue(queue_path, run_id)
+    try:
+        if fresh:
+            work.reset()
+        if not join:
+            work.prune()
+            NewsStore().drop_expired()
+            added = work.add(sorted(load_universe()))
+            retried = work.retry_failed()
+            print(f"📋 Run {work.run_id}: {added} new ticker(s) queued, {retried} failed ticker(s) to retry")
+        counts = work.counts()
+        if not counts:
+            print("❌ No tickers found.")
+            return 1
+        print_progress(counts)
+
+        if counts.get("pending") or counts.get("claimed"):
+            # spawn rather than fork: this process already runs alert and IBKR threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+                futures = [pool.submit(scan_worker, work.run_id, queue_path, processes) for _ in range(processes)]
+                while wait(futures, timeout=PROGRESS_INTERVAL).not_done:
+                    print_progress(work.counts())
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"❌ Scan worker crashed: {e}")
+
+        counts = work.counts()
+        print_progress(counts)
+        if counts.get("pending") or counts.get("claimed"):
+            print(f"⏸️ Run {work.run_id} is unfinished; run again with the same --run-id to resume.")
+        elif counts.get("failed"):
+            print(f"⚠️ {counts['failed']} ticker(s) failed; run again with --run-id {work.run_id} to retry them.")
+        print(f"⏱️ Finished in {time.perf_counter() - start:.1f}s with {processes} process(es)")
+        return 0
+    except KeyboardInterrupt:
+        print(f"\n⏸️ Interrupted; progress is saved. Run again with --run-id {work.run_id} to resume.")
+        return 130
+    finally:
+        work.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch, summarize and alert on news for CE/Expert and portfolio tickers.")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes; above 1 runs a sharded scan that can be resumed")
+    parser.add_argument("--run-id", help="sharded run to start or resume (default: today's date)")
+    parser.add_argument("--join", action="store_true",
+                        help="only work on an existing run's queue, e.g. from a second machine")
+    parser.add_argument("--fresh", action="store_true", help="discard the run's progress and start over")
+    parser.add_argument("--queue", default=SCAN_QUEUE_PATH, help="SQLite work queue file (default %(default)s)")
+    args = parser.parse_args()
+    if args.join and args.fresh:
+        parser.error("--fresh cannot be combined with --join")
+    try:
+        if args.processes > 1 or args.run_id or args.join:
+            return run_sharded(max(1, args.processes), args.run_id, args.queue, args.fresh, args.join)
+        return Scanner().run()
+    finally:
+        flush_alerts()
+        metrics.report("otc_stock_scanner")
 
-            send_alert(
-                title=f"{ticker} - {item['title']}",
-                message=summary_text
-            )
 
-except Exception as e:
-    print(f"❌ Error while processing: {e}")
-finally:
-    ib.disconnect()
+if __name__ == "__main__":
+    sys.exit(main())
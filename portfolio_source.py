@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from ibkr_connection import IBKR_CLIENT_ID, IBKR_HOST, IBKR_PORT, IBKRConnectionError, connect_ibkr, logger
+
+PORTFOLIO_SNAPSHOT_PATH = os.getenv("PORTFOLIO_SNAPSHOT_PATH", "portfolio_snapshot.json")
+PORTFOLIO_CLIENT_ID = int(os.getenv("IBKR_PORTFOLIO_CLIENT_ID", str(IBKR_CLIENT_ID + 10)))
+PORTFOLIO_MAX_AGE = float(os.getenv("PORTFOLIO_MAX_AGE_MINUTES", "15")) * 60  # snapshot age served without TWS
+CONNECT_WAIT = 10  # seconds get_portfolio_tickers waits for TWS when the snapshot is too old
+RECONNECT_DELAY = 5  # seconds, doubled after each failed attempt
+MAX_RECONNECT_DELAY = 300
+
+
+class PortfolioSource:
+    """IBKR positions kept current by one long-lived API connection and persisted to disk.
+
+    start() runs the connection in a background thread: it syncs positions on
+    connect, applies position events as they arrive and reconnects with backoff
+    when TWS goes away. get_portfolio_tickers() answers from the cached
+    snapshot, so callers do not pay the connect handshake and keep working
+    while TWS is down.
+    """
+
+    def __init__(self, snapshot_path=PORTFOLIO_SNAPSHOT_PATH, host=IBKR_HOST, port=IBKR_PORT,
+                 client_id=PORTFOLIO_CLIENT_ID, ib_factory=None):
+        self.snapshot_path = snapshot_path
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.ib_factory = ib_factory
+        self.positions = {}  # symbol -> quantity
+        self.updated_at = None  # epoch seconds of the last sync or position event
+        self.connected = False
+        self._snapshot_mtime = None
+        self.synced = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._load()
+
+    def _load(self):
+        try:
+            self._snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.positions = {symbol: float(qty) for symbol, qty in snapshot["positions"].items()}
+            self.updated_at = datetime.fromisoformat(snapshot["updated_at"]).timestamp()
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable portfolio snapshot {self.snapshot_path}: {e}")
+
+    def _save(self):
+        with self._lock:
+            snapshot = {"updated_at": datetime.fromtimestamp(self.updated_at).isoformat(timespec="seconds"),
+                        "positions": dict(sorted(self.positions.items()))}
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def age(self):
+        """Seconds since the snapshot was last updated, or None if there is none."""
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    def _sync(self, positions):
+        with self._lock:
+            self.positions = {pos.contract.symbol: float(pos.position)
+                              for pos in positions if pos.contract.symbol and pos.position}
+            self.updated_at = time.time()
+        self._save()
+        self.synced.set()
+        logger.info(f"Portfolio synced: {len(self.positions)} positions")
+
+    def _on_position(self, position):
+        symbol = position.contract.symbol
+        if not symbol:
+            return
+        with self._lock:
+            if position.position:
+                self.positions[symbol] = float(position.position)
+            else:
+                self.positions.pop(symbol, None)
+            self.updated_at = time.time()
+        self._save()
+        logger.info(f"Position update: {symbol} {position.position}")
+
+    def start(self):
+        """Connect in the background and keep the snapshot current until stop()."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ibkr-portfolio", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        # ib_insync drives its callbacks from an asyncio loop; this thread gets its own
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            ib = self.ib_factory() if self.ib_factory else None
+            try:
+                ib = connect_ibkr(read_only=True, host=self.host, port=self.port, client_id=self.client_id, ib=ib)
+            except IBKRConnectionError as e:
+                logger.warning(f"Portfolio feed: {e}; retrying in {delay}s")
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                continue
+
+            delay = RECONNECT_DELAY
+            self.connected = True
+            ib.positionEvent += self._on_position
+            try:
+                self._sync(ib.positions())
+                while not self._stop.is_set() and ib.isConnected():
+                    ib.sleep(1)  # runs the event loop, delivering position events
+            except Exception as e:
+                logger.warning(f"Portfolio feed dropped: {e}")
+            finally:
+                self.connected = False
+                ib.positionEvent -= self._on_position
+                ib.disconnect()
+            if not self._stop.is_set():
+                logger.warning("Portfolio feed disconnected; reconnecting")
+
+    def cached_tickers(self):
+        """Sorted symbols in the snapshot, without connecting to TWS.
+
+        While the feed is not running here the snapshot file is re-read whenever
+        its mtime changes, so a process that keeps the feed running elsewhere
+        (such as the scanner) is followed.
+        """
+        if not self.connected:
+            try:
+                mtime = os.stat(self.snapshot_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None and mtime != self._snapshot_mtime:
+                with self._lock:
+                    self._load()
+        with self._lock:
+            return sorted(self.positions)
+
+    def get_portfolio_tickers(self, max_age=PORTFOLIO_MAX_AGE, wait=CONNECT_WAIT):
+        """Sorted symbols of the current positions.
+
+        A snapshot younger than max_age seconds (or any snapshot while the feed
+        is connected) is returned right away. Otherwise the feed is started and
+        given up to wait seconds to sync, falling back to the last snapshot.
+        """
+        age = self.age()
+        if not self.connected and (age is None or age > max_age):
+            self.start()
+            if not self.synced.wait(wait):
+                if age is None:
+                    raise IBKRConnectionError("No portfolio snapshot and TWS did not answer in time")
+                logger.warning(f"TWS unavailable; using portfolio snapshot from {age / 60:.0f} minutes ago")
+        with self._lock:
+            return sorted(self.positions)
+
+
+_default_source = None
+_default_lock = threading.Lock()
+
+
+def get_default_source():
+    """Process-wide PortfolioSource, created on first use."""
+    global _default_source
+    with _default_lock:
+        if _default_source is None:
+            _default_source = PortfolioSource()
+        return _default_source
+
+
+def get_portfolio_tickers(max_age=PORTFOLIO_MAX_AGE, wait=CONNECT_WAIT):
+    return get_default_source().get_portfolio_tickers(max_age, wait)
@@ -0,0 +1,134 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SCAN_QUEUE_PATH = os.getenv("SCAN_QUEUE_PATH", "scan_queue.db")
+CLAIM_BATCH = int(os.getenv("SCAN_CLAIM_BATCH", "10"))  # tickers a worker claims per trip to the queue
+LEASE_SECONDS = float(os.getenv("SCAN_LEASE_SECONDS", "600"))  # unfinished claims older than this are handed out again
+MAX_ATTEMPTS = 3  # claims per ticker before it is marked failed
+RUN_RETENTION_DAYS = 7  # other runs idle this long are deleted by prune()
+BUSY_TIMEOUT_MS = 30000
+
+
+class ScanQueue:
+    """The tickers of one scan run, shared through SQLite by worker processes or machines.
+
+    Workers claim a few tickers at a time and mark each one done (the
+    checkpoint) as soon as its news is stored and alerted, so an interrupted
+    run resumes with only the tickers that are left. A claim whose worker died
+    without finishing is handed out again once it is `lease` seconds old.
+    """
+
+    def __init__(self, path=SCAN_QUEUE_PATH, run_id=None, lease=LEASE_SECONDS):
+        self.path = path
+        self.run_id = run_id or datetime.today().strftime("%Y-%m-%d")
+        self.lease = lease
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        # Autocommit; claim() opens its own write transaction
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_tasks (
+                run_id TEXT NOT NULL, ticker TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT, claimed_at REAL, finished_at REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,
+                PRIMARY KEY (run_id, ticker)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_tasks_status ON scan_tasks (run_id, status)")
+
+    def add(self, tickers):
+        """Queue tickers not already part of this run; returns how many were new."""
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO scan_tasks (run_id, ticker) VALUES (?, ?)",
+                                   [(self.run_id, ticker) for ticker in tickers])
+            return self._conn.total_changes - before
+
+    def retry_failed(self):
+        """Put this run's failed tickers back in the queue with fresh attempts; returns how many."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE scan_tasks SET status = 'pending', worker = NULL, claimed_at = NULL, attempts = 0 "
+                "WHERE run_id = ? AND status = 'failed'", (self.run_id,)).rowcount
+
+    def reset(self):
+        """Forget this run's progress."""
+        with self._lock:
+            self._conn.execute("DELETE FROM scan_tasks WHERE run_id = ?", (self.run_id,))
+
+    def prune(self, days=RUN_RETENTION_DAYS):
+        """Delete other runs with no activity in the last `days` days."""
+        with self._lock:
+            self._conn.execute("""
+                DELETE FROM scan_tasks WHERE run_id IN (
+                    SELECT run_id FROM scan_tasks WHERE run_id != ?
+                    GROUP BY run_id HAVING MAX(COALESCE(finished_at, claimed_at, 0)) < ?)
+            """, (self.run_id, time.time() - days * 86400))
+
+    def claim(self, limit=CLAIM_BATCH):
+        """Take up to limit pending (or abandoned) tickers for this worker."""
+        now = time.time()
+        expired = now - self.lease
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Abandoned claims of tickers that already used up their attempts will not be retried
+                self._conn.execute("""
+                    UPDATE scan_tasks SET status = 'failed', error = COALESCE(error, 'worker lost')
+                    WHERE run_id = ? AND status = 'claimed' AND claimed_at < ? AND attempts >= ?
+                """, (self.run_id, expired, MAX_ATTEMPTS))
+                tickers = [ticker for (ticker,) in self._conn.execute("""
+                    SELECT ticker FROM scan_tasks
+                    WHERE run_id = ? AND (status = 'pending' OR (status = 'claimed' AND claimed_at < ?))
+                    ORDER BY ticker LIMIT ?
+                """, (self.run_id, expired, limit))]
+                self._conn.executemany("""
+                    UPDATE scan_tasks SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1
+                    WHERE run_id = ? AND ticker = ?
+                """, [(self.worker, now, self.run_id, ticker) for ticker in tickers])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tickers
+
+    def complete(self, ticker):
+        with self._lock:
+            self._conn.execute("""
+                UPDATE scan_tasks SET status = 'done', finished_at = ?, error = NULL
+                WHERE run_id = ? AND ticker = ?
+            """, (time.time(), self.run_id, ticker))
+
+    def fail(self, ticker, error):
+        """Put ticker back in the queue, or mark it failed once it has had MAX_ATTEMPTS claims."""
+        with self._lock:
+            self._conn.execute("""
+                UPDATE scan_tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    error = ?, finished_at = ?
+                WHERE run_id = ? AND ticker = ? AND status = 'claimed'
+            """, (MAX_ATTEMPTS, str(error)[:500], time.time(), self.run_id, ticker))
+
+    def release(self, tickers):
+        """Hand back claimed tickers this worker did not get to, without using up an attempt."""
+        with self._lock:
+            self._conn.executemany("""
+                UPDATE scan_tasks SET status = 'pending', worker = NULL, claimed_at = NULL, attempts = attempts - 1
+                WHERE run_id = ? AND ticker = ? AND status = 'claimed' AND worker = ?
+            """, [(self.run_id, ticker, self.worker) for ticker in tickers])
+
+    def counts(self):
+        """{status: tickers} for this run."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM scan_tasks WHERE run_id = ? GROUP BY status",
+                                      (self.run_id,)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+import time
+
+EVICT_EVERY = 200  # writes between eviction passes
+
+
+class SQLiteCache:
+    """Base for the on-disk caches: one table keyed by `key` with a TTL and an LRU bound.
+
+    Subclasses set `table`, `columns` (their value columns) and `stamp_column`,
+    the time the TTL counts from. Every row also has accessed_at. Rows older
+    than ttl seconds are dropped, and beyond max_entries the least recently
+    used go first. Safe to share between threads.
+    """
+
+    table = None
+    columns = None
+    stamp_column = None
+
+    def __init__(self, path, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY, {self.columns}, {self.stamp_column} REAL, accessed_at REAL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table} (accessed_at)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{self.stamp_column.split('_')[0]} "
+                           f"ON {self.table} ({self.stamp_column})")
+        self._conn.commit()
+        self.evict()
+
+    def _expired(self, stamp):
+        return time.time() - stamp > self.ttl
+
+    def _touch(self, key):
+        """Mark key as just used; the caller holds the lock."""
+        self._conn.execute(f"UPDATE {self.table} SET accessed_at=? WHERE key=?", (time.time(), key))
+        self._conn.commit()
+
+    def _write(self, sql, params):
+        """Run one write and every EVICT_EVERY writes an eviction pass."""
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE {self.stamp_column} < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_defaults = {}
+_defaults_lock = threading.Lock()
+
+
+def default_cache(cls):
+    """Process-wide instance of cls with its default settings, opened on first use."""
+    with _defaults_lock:
+        if cls not in _defaults:
+            _defaults[cls] = cls()
+        return _defaults[cls]
@@ -0,0 +1,148 @@
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import status_db
+
+COHORT_DAYS = (7, 30, 90)  # "exited within N days of entry" windows
+COHORT_FREQ = "W"  # entries are grouped into weekly cohorts
+
+
+def load_intervals(conn, source=None, since=None):
+    """Status intervals as a DataFrame: source, ticker, entered, exited (NaT while still listed).
+
+    since (YYYY-MM-DD) keeps only stays that were still open on or after that day.
+    """
+    sql = "SELECT source, ticker, entered_date, exited_date FROM status_intervals"
+    clauses, params = [], []
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    if since:
+        clauses.append("(exited_date IS NULL OR exited_date >= ?)")
+        params.append(since)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    df = pd.DataFrame(conn.execute(sql, params).fetchall(), columns=["source", "ticker", "entered", "exited"])
+    df["entered"] = pd.to_datetime(df["entered"], format="%Y-%m-%d")
+    df["exited"] = pd.to_datetime(df["exited"], format="%Y-%m-%d")
+    return df
+
+
+def analyze(intervals, as_of=None, within=COHORT_DAYS, cohort_freq=COHORT_FREQ):
+    """Compute dwell times, churn, round trips and exit cohorts from load_intervals() output.
+
+    Stays that began on a source's earliest snapshot are the baseline: they were
+    already listed when tracking started, so they are not counted as entries.
+    Returns a dict of DataFrames: summary, per_ticker, churn and cohorts.
+    """
+    as_of = np.datetime64(pd.Timestamp(as_of or datetime.today()).normalize(), "D")
+    entered = intervals["entered"].to_numpy("datetime64[D]")
+    exited = intervals["exited"].to_numpy("datetime64[D]")
+    is_open = np.isnat(exited)
+    dwell = (np.where(is_open, as_of, exited) - entered).astype(np.int64)
+    first_seen = intervals.groupby("source")["entered"].transform("min").to_numpy("datetime64[D]")
+    baseline = entered == first_seen
+
+    df = intervals.assign(dwell_days=dwell, open=is_open, round_trip=~is_open & ~baseline, baseline=baseline)
+
+    per_ticker = df.groupby(["source", "ticker"], sort=False).agg(
+        stays=("dwell_days", "size"),
+        round_trips=("round_trip", "sum"),
+        total_days=("dwell_days", "sum"),
+        longest_stay=("dwell_days", "max"),
+        listed=("open", "any"),
+        first_entered=("entered", "min"),
+        last_exited=("exited", "max"),
+    ).reset_index()
+    current = df.loc[is_open, ["source", "ticker", "dwell_days"]].rename(columns={"dwell_days": "current_days"})
+    per_ticker = per_ticker.merge(current, on=["source", "ticker"], how="left")
+    per_ticker["current_days"] = per_ticker["current_days"].astype("Int64")
+
+    entries = df[~baseline].groupby(["source", "entered"]).size().rename("entries")
+    exits = df[~is_open].groupby(["source", "exited"]).size().rename("exits")
+    entries.index.names = exits.index.names = ["source", "date"]
+    churn = pd.concat([entries, exits], axis=1).fillna(0).astype(np.int64)
+    churn["net"] = churn["entries"] - churn["exits"]
+    churn = churn.sort_index().reset_index()
+
+    new = df[~baseline]
+    new_entered = entered[~baseline]
+    columns = {"cohort": new["entered"].dt.to_period(cohort_freq).dt.start_time, "entries": 1}
+    for days in within:
+        # Only entries old enough to have had the full window count towards the rate
+        eligible = new_entered <= as_of - np.timedelta64(days, "D")
+        columns[f"eligible_{days}d"] = eligible
+        columns[f"exited_{days}d"] = eligible & ~new["open"].to_numpy() & (new["dwell_days"].to_numpy() <= days)
+    cohorts = new[["source"]].assign(**columns).groupby(["source", "cohort"]).sum()
+    for days in within:
+        eligible = cohorts.pop(f"eligible_{days}d")
+        cohorts[f"exited_{days}d_rate"] = (cohorts[f"exited_{days}d"] / eligible.where(eligible > 0)).round(3)
+    cohorts = cohorts.reset_index()
+
+    closed = df[df["round_trip"]]
+    summary = pd.DataFrame({
+        "listed_now": df[is_open].groupby("source").size(),
+        "tickers_seen": df.groupby("source")["ticker"].nunique(),
+        "round_trips": closed.groupby("source").size(),
+        "median_dwell_closed": closed.groupby("source")["dwell_days"].median(),
+        "mean_dwell_closed": closed.groupby("source")["dwell_days"].mean().round(1),
+        "median_dwell_open": df[is_open].groupby("source")["dwell_days"].median(),
+        "entries_per_day": churn.groupby("source")["entries"].mean().round(2),
+        "exits_per_day": churn.groupby("source")["exits"].mean().round(2),
+    })
+    summary.index.name = "source"
+    summary = summary.reset_index()
+    for column in ("listed_now", "tickers_seen", "round_trips"):
+        summary[column] = summary[column].fillna(0).astype(np.int64)
+
+    return {"summary": summary, "per_ticker": per_ticker, "churn": churn, "cohorts": cohorts}
+
+
+def to_records(df):
+    """DataFrame rows as JSON-ready dicts: dates as YYYY-MM-DD, missing values as None."""
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d")
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+
+def get_analytics(conn=None, source=None, since=None, as_of=None, within=COHORT_DAYS):
+    with status_db.open_db(conn) as db:
+        return analyze(load_intervals(db, source, since), as_of, within)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CE/Expert status history analytics.")
+    parser.add_argument("--source", choices=["Caveat Emptor", "Expert Market"], help="limit to one source")
+    parser.add_argument("--days", type=int, default=30, help="days of churn to print (default 30)")
+    parser.add_argument("--within", type=int, nargs="+", default=list(COHORT_DAYS),
+                        help="exit cohort windows in days (default %(default)s)")
+    parser.add_argument("--top", type=int, default=20, help="longest-listed tickers to print (default 20)")
+    args = parser.parse_args()
+
+    result = get_analytics(source=args.source, within=args.within)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print("📊 Summary:")
+        print(result["summary"].to_string(index=False) if len(result["summary"]) else "  no status history yet")
+
+        since = pd.Timestamp(datetime.today() - timedelta(days=args.days)).normalize()
+        churn = result["churn"][result["churn"]["date"] >= since]
+        print(f"\n🔁 Entries/exits over the last {args.days} days:")
+        print(churn.to_string(index=False) if len(churn) else "  none")
+
+        print("\n⏳ Exit rate by weekly entry cohort:")
+        print(result["cohorts"].tail(12).to_string(index=False) if len(result["cohorts"]) else "  none")
+
+        listed = result["per_ticker"][result["per_ticker"]["listed"]]
+        print(f"\n📌 Longest currently listed (top {args.top}):")
+        print(listed.nlargest(args.top, "current_days")[["source", "ticker", "current_days", "stays"]]
+              .to_string(index=False) if len(listed) else "  none")
+
+
+if __name__ == "__main__":
+    main()
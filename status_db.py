@@ -0,0 +1,359 @@
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+DB_PATH = "otc_status.db"
+BUSY_TIMEOUT_MS = 10000
+
+# Each entry upgrades the schema by one version; PRAGMA user_version records
+# how many have been applied, so a database is only ever migrated once.
+MIGRATIONS = [
+    # 1: the original tables, as created ad hoc by ce_expert_monitor
+    """
+    CREATE TABLE IF NOT EXISTS tickers (source TEXT, ticker TEXT, date TEXT);
+    CREATE TABLE IF NOT EXISTS ce_expert_entries (date TEXT, source TEXT, ticker TEXT);
+    CREATE TABLE IF NOT EXISTS ce_expert_exits (date TEXT, source TEXT, ticker TEXT);
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        filename TEXT PRIMARY KEY, date TEXT, size TEXT, modified TEXT, ingested_at TEXT
+    );
+    """,
+    # 2: drop duplicate rows left by older versions, then enforce uniqueness
+    """
+    DELETE FROM tickers WHERE rowid NOT IN (
+        SELECT MIN(rowid) FROM tickers GROUP BY source, date, ticker);
+    DELETE FROM ce_expert_entries WHERE rowid NOT IN (
+        SELECT MIN(rowid) FROM ce_expert_entries GROUP BY date, source, ticker);
+    DELETE FROM ce_expert_exits WHERE rowid NOT IN (
+        SELECT MIN(rowid) FROM ce_expert_exits GROUP BY date, source, ticker);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_tickers_source_date_ticker ON tickers (source, date, ticker);
+    CREATE INDEX IF NOT EXISTS idx_tickers_date ON tickers (date);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_date_source_ticker ON ce_expert_entries (date, source, ticker);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_exits_date_source_ticker ON ce_expert_exits (date, source, ticker);
+    """,
+    # 3: status intervals, built from the existing snapshot history
+    lambda conn: _create_intervals(conn),
+    # 4: per-ticker status index and the watched tickers it is matched against
+    lambda conn: _create_status_index(conn),
+]
+
+# ticker_status column holding the date a ticker entered each source, NULL when not listed
+SOURCE_COLUMNS = {"Caveat Emptor": "ce_since", "Expert Market": "em_since"}
+
+
+def connect(path=None):
+    """Open otc_status.db in WAL mode with the schema migrated to the latest version.
+
+    WAL lets the Flask app read while the monitor is writing.
+    """
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    migrate(conn)
+    return conn
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        logging.info(f"Migrating {DB_PATH} to schema version {number}")
+        try:
+            if callable(step):
+                conn.execute("BEGIN")
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+            else:
+                # executescript commits any pending transaction and runs in autocommit,
+                # so wrap the step and its version bump in one explicit transaction
+                conn.executescript(f"BEGIN; {step}; PRAGMA user_version = {number}; COMMIT;")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+
+def _create_intervals(conn):
+    # One row per stay of a ticker in a source; exited_date is the first
+    # snapshot date it was missing from, NULL while it is still listed.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS status_intervals (
+            source TEXT NOT NULL, ticker TEXT NOT NULL,
+            entered_date TEXT NOT NULL, exited_date TEXT,
+            PRIMARY KEY (source, ticker, entered_date)
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_intervals_open
+        ON status_intervals (source, ticker) WHERE exited_date IS NULL
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_entered ON status_intervals (source, entered_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_exited ON status_intervals (source, exited_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_ticker ON status_intervals (ticker)")
+    # Date of the newest snapshot folded into status_intervals, per source
+    conn.execute("CREATE TABLE IF NOT EXISTS snapshot_state (source TEXT PRIMARY KEY, last_date TEXT)")
+    for (source,) in conn.execute("SELECT DISTINCT source FROM tickers").fetchall():
+        rebuild_intervals(conn, source, reindex=False)  # ticker_status arrives in migration 4
+
+
+def _create_status_index(conn):
+    # One row per ticker ever seen in a source: when it entered each source it
+    # is listed in now, and the date of its latest entry or exit in any source.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ticker_status (
+            ticker TEXT PRIMARY KEY, ce_since TEXT, em_since TEXT, last_change TEXT
+        )
+    """)
+    # Tickers held or on the watchlist when watched changes were last checked
+    conn.execute("CREATE TABLE IF NOT EXISTS watched_tickers (ticker TEXT PRIMARY KEY, origin TEXT NOT NULL)")
+    for source in SOURCE_COLUMNS:
+        refresh_status_index(conn, source)
+
+
+@contextmanager
+def open_db(conn=None):
+    """Yield conn if given, otherwise a fresh connection that is closed afterwards."""
+    if conn is not None:
+        yield conn
+        return
+    conn = connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def save_tickers(conn, source, tickers, date_str):
+    """Insert the (source, date, ticker) rows that are not stored yet; returns rows added."""
+    before = conn.total_changes
+    conn.executemany(
+        "INSERT OR IGNORE INTO tickers (source, ticker, date) VALUES (?, ?, ?)",
+        ((source, ticker, date_str) for ticker in tickers)
+    )
+    return conn.total_changes - before
+
+
+def replace_tickers(conn, source, tickers, date_str):
+    """Make the stored snapshot for (source, date) exactly `tickers`."""
+    conn.execute("DELETE FROM tickers WHERE source=? AND date=?", (source, date_str))
+    save_tickers(conn, source, tickers, date_str)
+
+
+def save_entries(conn, source, tickers, date_str):
+    conn.executemany(
+        "INSERT OR IGNORE INTO ce_expert_entries (date, source, ticker) VALUES (?, ?, ?)",
+        ((date_str, source, ticker) for ticker in tickers)
+    )
+
+
+def save_exits(conn, source, tickers, date_str):
+    conn.executemany(
+        "INSERT OR IGNORE INTO ce_expert_exits (date, source, ticker) VALUES (?, ?, ?)",
+        ((date_str, source, ticker) for ticker in tickers)
+    )
+
+
+def load_manifest(conn):
+    """Return {filename: (size, modified)} for every compliance file already ingested."""
+    return {row[0]: (row[1], row[2]) for row in conn.execute("SELECT filename, size, modified FROM ingested_files")}
+
+
+def record_ingested(conn, filename, date_str, facts):
+    conn.execute(
+        "INSERT OR REPLACE INTO ingested_files (filename, date, size, modified, ingested_at) VALUES (?, ?, ?, ?, ?)",
+        (filename, date_str, facts.get("size"), facts.get("modify"), datetime.now().isoformat(timespec="seconds"))
+    )
+
+
+def get_entries_and_exits(conn, date_str):
+    entries = conn.execute("SELECT source, ticker FROM ce_expert_entries WHERE date=?", (date_str,)).fetchall()
+    exits = conn.execute("SELECT source, ticker FROM ce_expert_exits WHERE date=?", (date_str,)).fetchall()
+    return entries, exits
+
+
+def get_status_since(conn, date_str):
+    """Distinct (source, ticker) pairs listed on or after date_str."""
+    return conn.execute("SELECT DISTINCT source, ticker FROM tickers WHERE date >= ?", (date_str,)).fetchall()
+
+
+def get_last_snapshot_date(conn, source):
+    row = conn.execute("SELECT last_date FROM snapshot_state WHERE source=?", (source,)).fetchone()
+    return row[0] if row else None
+
+
+def get_open_tickers(conn, source):
+    """Return {ticker: entered_date} for every ticker currently listed in source."""
+    return dict(conn.execute(
+        "SELECT ticker, entered_date FROM status_intervals WHERE source=? AND exited_date IS NULL", (source,)
+    ))
+
+
+def apply_snapshot(conn, source, current, date_str):
+    """Fold one day's snapshot into tickers, status_intervals and the entry/exit tables.
+
+    Work is proportional to the number of changes against the open intervals.
+    Returns (entered, exited) as sorted lists matching the rows written to
+    the entry/exit tables, so a same-day change undone by a re-apply is in
+    neither; or None when date_str is older than the newest snapshot already
+    applied (use rebuild_intervals then).
+    The first snapshot of a source only sets the baseline and reports no changes.
+    The caller commits.
+    """
+    last_date = get_last_snapshot_date(conn, source)
+    replace_tickers(conn, source, current, date_str)
+    if last_date is not None and date_str < last_date:
+        return None
+
+    open_since = get_open_tickers(conn, source)
+    exited = sorted(open_since.keys() - current)
+    entered = sorted(current - open_since.keys())
+
+    if date_str == last_date:
+        # Re-applying the newest day (e.g. the PM file after the AM file):
+        # undo same-day stays and same-day exits instead of stacking new rows.
+        same_day = [t for t in exited if open_since[t] == date_str]
+        closed_today = {row[0] for row in conn.execute(
+            "SELECT ticker FROM status_intervals WHERE source=? AND exited_date=?", (source, date_str))}
+        reopened = [t for t in entered if t in closed_today]
+        conn.executemany("DELETE FROM status_intervals WHERE source=? AND ticker=? AND entered_date=?",
+                         ((source, t, date_str) for t in same_day))
+        conn.executemany("DELETE FROM ce_expert_entries WHERE date=? AND source=? AND ticker=?",
+                         ((date_str, source, t) for t in same_day))
+        conn.executemany("UPDATE status_intervals SET exited_date=NULL WHERE source=? AND ticker=? AND exited_date=?",
+                         ((source, t, date_str) for t in reopened))
+        conn.executemany("DELETE FROM ce_expert_exits WHERE date=? AND source=? AND ticker=?",
+                         ((date_str, source, t) for t in reopened))
+        same_day, reopened = set(same_day), set(reopened)
+        closing = [t for t in exited if t not in same_day]
+        opening = [t for t in entered if t not in reopened]
+    else:
+        closing, opening = exited, entered
+
+    conn.executemany("UPDATE status_intervals SET exited_date=? WHERE source=? AND ticker=? AND exited_date IS NULL",
+                     ((date_str, source, t) for t in closing))
+    conn.executemany("INSERT INTO status_intervals (source, ticker, entered_date) VALUES (?, ?, ?)",
+                     ((source, t, date_str) for t in opening))
+    conn.execute("INSERT OR REPLACE INTO snapshot_state (source, last_date) VALUES (?, ?)", (source, date_str))
+
+    refresh_status_index(conn, source, entered + exited)
+
+    if last_date is None:
+        logging.info(f"First {source} snapshot on {date_str}: {len(current)} tickers as baseline")
+        return [], []
+    save_exits(conn, source, closing, date_str)
+    save_entries(conn, source, opening, date_str)
+    return opening, closing
+
+
+def rebuild_intervals(conn, source, reindex=True):
+    """Recompute status_intervals (and the source's ticker_status column) from the snapshot history."""
+    conn.execute("DELETE FROM status_intervals WHERE source=?", (source,))
+    open_since = {}
+    rows = []
+    last_date = None
+    history = conn.execute("SELECT date, ticker FROM tickers WHERE source=? ORDER BY date", (source,))
+    for date_str, group in groupby(history, key=itemgetter(0)):
+        current = {ticker for _, ticker in group}
+        for ticker in open_since.keys() - current:
+            rows.append((source, ticker, open_since.pop(ticker), date_str))
+        for ticker in current - open_since.keys():
+            open_since[ticker] = date_str
+        last_date = date_str
+    rows.extend((source, ticker, entered, None) for ticker, entered in open_since.items())
+    conn.executemany(
+        "INSERT INTO status_intervals (source, ticker, entered_date, exited_date) VALUES (?, ?, ?, ?)", rows)
+    if last_date is None:
+        conn.execute("DELETE FROM snapshot_state WHERE source=?", (source,))
+    else:
+        conn.execute("INSERT OR REPLACE INTO snapshot_state (source, last_date) VALUES (?, ?)", (source, last_date))
+    if reindex:
+        refresh_status_index(conn, source)
+    logging.info(f"Rebuilt {len(rows)} {source} intervals through {last_date}")
+
+
+def refresh_status_index(conn, source, tickers=None):
+    """Recompute source's column of ticker_status from status_intervals.
+
+    With tickers only those rows are touched, so apply_snapshot pays for the
+    day's changes rather than the whole listing. last_change only moves forward.
+    """
+    column = SOURCE_COLUMNS.get(source)
+    if column is None:
+        return
+    upsert = f"""
+        INSERT INTO ticker_status (ticker, {column}, last_change)
+        SELECT ticker, MAX(CASE WHEN exited_date IS NULL THEN entered_date END),
+               MAX(COALESCE(exited_date, entered_date))
+        FROM status_intervals WHERE source=? {{}} GROUP BY ticker
+        ON CONFLICT (ticker) DO UPDATE SET {column}=excluded.{column},
+            last_change=MAX(COALESCE(ticker_status.last_change, ''), excluded.last_change)
+    """
+    if tickers is None:
+        conn.execute(f"UPDATE ticker_status SET {column}=NULL")
+        conn.execute(upsert.format(""), (source,))
+    else:
+        conn.executemany(f"UPDATE ticker_status SET {column}=NULL WHERE ticker=?", ((t,) for t in tickers))
+        conn.executemany(upsert.format("AND ticker=?"), ((source, t) for t in tickers))
+
+
+def get_ticker_status(conn, tickers):
+    """{ticker: ([(source, entered_date), ...], last_change)} for tickers in the status index.
+
+    Tickers that left CE/EM keep their row (with no sources) until prune_history.
+    """
+    tickers = list(tickers)
+    status = {}
+    columns = ", ".join(SOURCE_COLUMNS.values())
+    for start in range(0, len(tickers), 500):
+        chunk = tickers[start:start + 500]
+        for ticker, *since, last_change in conn.execute(
+                f"SELECT ticker, {columns}, last_change FROM ticker_status "
+                f"WHERE ticker IN ({','.join('?' * len(chunk))})", chunk):
+            listed = [(source, date) for source, date in zip(SOURCE_COLUMNS, since) if date]
+            status[ticker] = (listed, last_change)
+    return status
+
+
+def get_watched(conn):
+    """{ticker: origin} as stored by the last save_watched."""
+    return dict(conn.execute("SELECT ticker, origin FROM watched_tickers"))
+
+
+def save_watched(conn, added, removed):
+    """Apply a diff to watched_tickers: added is {ticker: origin}, removed an iterable of tickers."""
+    conn.executemany("INSERT OR REPLACE INTO watched_tickers (ticker, origin) VALUES (?, ?)", added.items())
+    conn.executemany("DELETE FROM watched_tickers WHERE ticker=?", ((t,) for t in removed))
+
+
+def get_tickers_on_date(conn, source, date_str):
+    """Tickers listed in source on date_str."""
+    return {row[0] for row in conn.execute(
+        "SELECT ticker FROM status_intervals WHERE source=? AND entered_date<=? "
+        "AND (exited_date IS NULL OR exited_date>?)", (source, date_str, date_str))}
+
+
+def get_ticker_intervals(conn, ticker):
+    """All (source, entered_date, exited_date) stays of ticker, oldest first."""
+    return conn.execute(
+        "SELECT source, entered_date, exited_date FROM status_intervals WHERE ticker=? ORDER BY entered_date",
+        (ticker,)).fetchall()
+
+
+def get_days_listed(conn, source, ticker, as_of):
+    """Days ticker has been continuously listed in source as of as_of (YYYY-MM-DD), or None."""
+    row = conn.execute(
+        "SELECT entered_date FROM status_intervals WHERE source=? AND ticker=? AND exited_date IS NULL",
+        (source, ticker)).fetchone()
+    if row is None:
+        return None
+    return (datetime.strptime(as_of, "%Y-%m-%d") - datetime.strptime(row[0], "%Y-%m-%d")).days
+
+
+def prune_history(conn, cutoff_date):
+    """Drop raw snapshots, closed intervals and unlisted status rows older than cutoff_date."""
+    conn.execute("DELETE FROM tickers WHERE date < ?", (cutoff_date,))
+    conn.execute("DELETE FROM status_intervals WHERE exited_date < ?", (cutoff_date,))
+    conn.execute("DELETE FROM ticker_status WHERE ce_since IS NULL AND em_since IS NULL AND last_change < ?",
+                 (cutoff_date,))
@@ -1,29 +1,56 @@
 import os
 import openai
 from dotenv import load_dotenv
+from summary_cache import get_default_cache, summary_key
+from metrics import span
 
 load_dotenv()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-def summarize_text(text, ticker=None):
-    if not text.strip():
-        return ""
-    prompt = f"""
+MODEL = "gpt-4o-mini"  # or gpt-4
+MAX_TOKENS = 300
+PROMPT_TEMPLATE = """
 You are a financial analyst. Summarize the following news and state whether it may have a positive, negative, or neutral impact on the stock {ticker}. Also provide a KEEP/REMOVE suggestion.
 
 News: {text}
 
 Summary:
 """
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",  # or gpt-4
+
+_client = None
+
+def get_client():
+    """OpenAI client shared by every summarize_text call."""
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+def summarize_text(text, ticker=None, client=None, cache=None):
+    """Summarize text for ticker, reusing a cached summary of identical text when there is one.
+
+    client and cache default to the shared OpenAI client and summary_cache.db;
+    pass stand-ins to run without either.
+    """
+    if not text.strip():
+        return ""
+    prompt = PROMPT_TEMPLATE.format(ticker=ticker, text=text)
+    cache = cache or get_default_cache()
+    key = summary_key(text, ticker, MODEL, PROMPT_TEMPLATE)
+    return cache.get_or_compute(key, lambda: _complete(prompt, client or get_client()))
+
+def complete(prompt, client, max_tokens=MAX_TOKENS):
+    """Send one chat completion and return the raw response; errors propagate."""
+    with span("llm_call", model=MODEL):
+        return client.chat.completions.create(
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
-            max_tokens=300
+            max_tokens=max_tokens
         )
-        return response.choices[0].message.content.strip()
+
+def _complete(prompt, client):
+    try:
+        return complete(prompt, client).choices[0].message.content.strip()
     except Exception as e:
         print(f"Error summarizing text: {e}")
         return ""
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Future
+
+from metrics import incr
+from sqlite_cache import SQLiteCache, default_cache
+
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.db")
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "20000"))
+
+
+def summary_key(text, ticker, model, prompt):
+    """Content hash identifying one summarization request."""
+    payload = json.dumps([model, prompt, ticker or "", text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache(SQLiteCache):
+    """SQLite-backed store of LLM summaries keyed by summary_key.
+
+    Concurrent requests for the same key are coalesced so the LLM is called once.
+    hits/misses count lookups since the cache was opened.
+    """
+
+    table = "summaries"
+    columns = "summary TEXT"
+    stamp_column = "created_at"
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, ttl_days=SUMMARY_CACHE_TTL_DAYS,
+                 max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        super().__init__(path, ttl_days * 86400, max_entries)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT summary, created_at FROM summaries WHERE key=?", (key,)).fetchone()
+            if row is None or self._expired(row[1]):
+                return None
+            self._touch(key)
+            return row[0]
+
+    def put(self, key, summary):
+        now = time.time()
+        self._write("INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, summary, now, now))
+
+    def record_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        incr("summary_cache_lookups", result="hit" if hit else "miss")
+
+    def get_or_compute(self, key, compute):
+        """Return the cached summary for key, or compute() it once and cache it.
+
+        Empty results (failed LLM calls) are returned but not cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.record_lookup(hit=True)
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        self.record_lookup(hit=not owner)
+        if not owner:
+            return future.result()
+
+        try:
+            summary = compute()
+            if summary:
+                self.put(key, summary)
+            future.set_result(summary)
+            return summary
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+def get_default_cache():
+    """Process-wide SummaryCache, opened on first use."""
+    return default_cache(SummaryCache)
@@ -0,0 +1,240 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+from summarizer import MAX_TOKENS, MODEL, PROMPT_TEMPLATE, complete, get_client
+from summary_cache import get_default_cache, summary_key
+from metrics import incr
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))  # requests per minute
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))  # tokens per minute
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))  # 1 disables batching
+LLM_BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "600"))  # longer items get their own call
+LLM_MAX_RETRIES = 5
+RETRY_BASE_DELAY = 2  # seconds, doubled per retry
+
+BATCH_PROMPT_TEMPLATE = """
+You are a financial analyst. For each news item below, summarize it and state whether it may have a positive, negative, or neutral impact on the item's stock. Also provide a KEEP/REMOVE suggestion.
+
+Reply with only a JSON array containing one object per item: {{"id": <item id>, "summary": "<summary>"}}.
+
+Items:
+{items}
+"""
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError,
+                    openai.InternalServerError)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute; acquire() blocks until enough are available."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        # A request larger than the whole bucket goes through once the bucket is full
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= amount
+
+
+class RateBudget:
+    """Requests-per-minute and tokens-per-minute limits shared by all LLM worker threads."""
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait == 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+            time.sleep(wait)
+
+    def settle(self, estimated, actual):
+        """Correct the token bucket once the real usage of a call is known."""
+        with self._lock:
+            self.tokens.take(actual - estimated)
+
+
+class SummaryPipeline:
+    """Summarizes many news items in parallel under an RPM/TPM budget.
+
+    Items already in the summary cache are returned without a call, duplicates
+    are summarized once, and short items are packed several to a prompt.
+    """
+
+    def __init__(self, client=None, cache=None, max_workers=LLM_CONCURRENCY, rpm=LLM_RPM, tpm=LLM_TPM,
+                 batch_size=LLM_BATCH_SIZE, batch_max_chars=LLM_BATCH_MAX_CHARS):
+        self.client = client
+        self.cache = cache or get_default_cache()
+        self.max_workers = max_workers
+        self.budget = RateBudget(rpm, tpm)
+        self.batch_size = batch_size
+        self.batch_max_chars = batch_max_chars
+        self.calls = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """Summarize (ticker, text, payload) tuples; yields ((ticker, text, payload), summary) as they finish."""
+        done, pending, jobs = self._plan(items)
+        yield from done
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm") as pool:
+            futures = [pool.submit(self._summarize_job, [(key, pending[key][0]) for key in job]) for job in jobs]
+            for future in as_completed(futures):
+                yield from self._finish(future.result(), pending)
+
+    def summarize(self, items):
+        """Like run(), but calls the LLM from the calling thread and returns a list.
+
+        For callers that run their own worker threads; the rate budget is still shared.
+        """
+        done, pending, jobs = self._plan(items)
+        for job in jobs:
+            done.extend(self._finish(self._summarize_job([(key, pending[key][0]) for key in job]), pending))
+        return done
+
+    def _batchable(self, text):
+        return self.batch_size > 1 and len(text) <= self.batch_max_chars
+
+    def _plan(self, items):
+        """Return (cached results, {key: items} still to summarize, jobs as lists of keys).
+
+        Keys are single-prompt cache keys. A summary is cached under the prompt
+        that produced it, so an item that would be batched also accepts a
+        cached batch-prompt summary.
+        """
+        done = []
+        pending = {}
+        for item in items:
+            ticker, text, _ = item
+            if not text.strip():
+                done.append((item, ""))
+                continue
+            key = summary_key(text, ticker, MODEL, PROMPT_TEMPLATE)
+            cached = self.cache.get(key)
+            if cached is None and self._batchable(text):
+                cached = self.cache.get(summary_key(text, ticker, MODEL, BATCH_PROMPT_TEMPLATE))
+            self.cache.record_lookup(hit=cached is not None or key in pending)
+            if cached is not None:
+                done.append((item, cached))
+                continue
+            pending.setdefault(key, []).append(item)
+
+        if self.batch_size > 1:
+            short = [key for key, group in pending.items() if self._batchable(group[0][1])]
+            short_keys = set(short)
+            jobs = [[key] for key in pending if key not in short_keys]
+            jobs += [short[i:i + self.batch_size] for i in range(0, len(short), self.batch_size)]
+        else:
+            jobs = [[key] for key in pending]
+        return done, pending, jobs
+
+    def _finish(self, summaries, pending):
+        results = []
+        for key, (summary, template) in summaries.items():
+            if summary:
+                ticker, text, _ = pending[key][0]
+                self.cache.put(summary_key(text, ticker, MODEL, template), summary)
+            results.extend((item, summary) for item in pending[key])
+        return results
+
+    def _summarize_job(self, job):
+        """Return {key: (summary, prompt template that produced it)} for a job of one or more (key, item) pairs."""
+        if len(job) == 1:
+            key, (ticker, text, _) = job[0]
+            return {key: (self._summarize_one(ticker, text), PROMPT_TEMPLATE)}
+        try:
+            summaries = {key: (summary, BATCH_PROMPT_TEMPLATE)
+                         for key, summary in self._summarize_batch(job).items() if summary}
+        except Exception as e:
+            print(f"Batched summary failed, falling back to single calls: {e}")
+            summaries = {}
+        # Anything the batch answer left out is retried on its own
+        for key, (ticker, text, _) in job:
+            if key not in summaries:
+                summaries[key] = (self._summarize_one(ticker, text), PROMPT_TEMPLATE)
+        return summaries
+
+    def _summarize_one(self, ticker, text):
+        prompt = PROMPT_TEMPLATE.format(ticker=ticker, text=text)
+        try:
+            return self._call(prompt, MAX_TOKENS).strip()
+        except Exception as e:
+            print(f"Error summarizing text: {e}")
+            return ""
+
+    def _summarize_batch(self, job):
+        entries = [{"id": i, "ticker": ticker, "news": text} for i, (_, (ticker, text, _)) in enumerate(job)]
+        prompt = BATCH_PROMPT_TEMPLATE.format(items=json.dumps(entries, ensure_ascii=False))
+        content = self._call(prompt, min(MAX_TOKENS * len(job), 4000))
+        # Tolerate a ```json fence or prose around the array
+        content = content[content.index("["):content.rindex("]") + 1]
+        answers = {int(answer["id"]): str(answer["summary"]).strip() for answer in json.loads(content)}
+        return {key: answers.get(i, "") for i, (key, _) in enumerate(job)}
+
+    def _call(self, prompt, max_tokens):
+        """One budgeted LLM call, retried with backoff on rate limits and transient errors."""
+        client = self.client or get_client()
+        estimated = estimate_tokens(prompt) + max_tokens
+        delay = RETRY_BASE_DELAY
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            self.budget.acquire(estimated)
+            with self._lock:
+                self.calls += 1
+            try:
+                response = complete(prompt, client, max_tokens)
+            except RETRYABLE_ERRORS as e:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                incr("llm_retries", error=type(e).__name__)
+                wait = _retry_after(e) or delay * (1 + random.random())
+                print(f"LLM call failed ({type(e).__name__}); retrying in {wait:.1f}s")
+                time.sleep(wait)
+                delay *= 2
+                continue
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.budget.settle(estimated, usage.prompt_tokens + usage.completion_tokens)
+            return response.choices[0].message.content
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
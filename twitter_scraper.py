@@ -1,14 +1,20 @@
+from datetime import date, timedelta
+from itertools import islice
+
 import snscrape.modules.twitter as sntwitter
 
+LOOKBACK_DAYS = 7
+
 def get_twitter_news(ticker, max_results=5):
-    query = f"${ticker} since:2024-01-01"
+    # snscrape pages through results lazily; stop after max_results tweets
+    since = (date.today() - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    query = f"${ticker} since:{since}"
     tweets = []
-    for i, tweet in enumerate(sntwitter.TwitterSearchScraper(query).get_items()):
-        if i >= max_results:
-            break
+    for tweet in islice(sntwitter.TwitterSearchScraper(query).get_items(), max_results):
         tweets.append({
             "title": tweet.content[:80] + "...",
             "link": f"https://twitter.com/{tweet.user.username}/status/{tweet.id}",
-            "summary": tweet.content
+            "summary": tweet.content,
+            "date": tweet.date,
         })
     return tweets
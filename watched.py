@@ -0,0 +1,73 @@
+import logging
+import threading
+
+import status_db
+from alert_utils import PRIORITY_HIGH, PRIORITY_NORMAL, send_alert
+from watchlist import load_watchlist, watchlist_version
+
+PORTFOLIO = "portfolio"
+WATCHLIST = "watchlist"
+
+_lock = threading.Lock()
+_state = {"version": None, "watched": {}, "checked": None}
+
+
+def load_held():
+    """Symbols in the IBKR portfolio snapshot; never connects to TWS."""
+    try:
+        from portfolio_source import get_default_source
+    except ImportError:  # ib_insync not installed
+        return []
+    return get_default_source().cached_tickers()
+
+
+def _load():
+    held = load_held()
+    version = (watchlist_version(), tuple(held))
+    with _lock:
+        if version != _state["version"]:
+            watched = dict.fromkeys(load_watchlist(), WATCHLIST)
+            watched.update(dict.fromkeys(held, PORTFOLIO))  # held wins over watchlist
+            _state.update(version=version, watched=watched)
+        return _state["watched"], version
+
+
+def get_watched():
+    """{ticker: "portfolio" | "watchlist"}, rebuilt only when the watchlist or portfolio changed."""
+    return _load()[0]
+
+
+def alert_priority(tickers, watched):
+    return PRIORITY_HIGH if any(watched.get(t) == PORTFOLIO for t in tickers) else PRIORITY_NORMAL
+
+
+def alert_newly_watched(conn=None):
+    """Alert on tickers newly held or added to the watchlist that are already in CE/EM.
+
+    Does nothing unless the watchlist file or portfolio snapshot changed since
+    the last check. The watched set is then diffed against watched_tickers
+    and only the added tickers are looked up in the status index. Returns the
+    tickers alerted on.
+    """
+    watched, version = _load()
+    if version == _state["checked"]:
+        return []
+    with status_db.open_db(conn) as db:
+        before = status_db.get_watched(db)
+        added = {t: origin for t, origin in watched.items() if before.get(t) != origin}
+        removed = before.keys() - watched.keys()
+        with db:
+            status_db.save_watched(db, added, removed)
+        status = status_db.get_ticker_status(db, added)
+    _state["checked"] = version
+    if added or removed:
+        logging.info(f"Watched tickers changed: {len(added)} added, {len(removed)} removed")
+
+    listed = [t for t in sorted(added) if t in status and status[t][0]]
+    if listed:
+        lines = [f"{t} ({added[t]}): " + ", ".join(f"{source} since {since}" for source, since in status[t][0])
+                 for t in listed]
+        message = "⚠️ Newly watched tickers already in CE/Expert:\n" + "\n".join(lines)
+        print(message)
+        send_alert("Watched CE/Expert Tickers", message, alert_priority(listed, added))
+    return listed
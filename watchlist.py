@@ -1,10 +1,29 @@
-
 import os
 
 WATCHLIST_FILE = "watchlist.txt"
 
-def load_watchlist():
-    if not os.path.exists(WATCHLIST_FILE):
+_cache = {}  # path -> ((mtime_ns, size), tickers)
+
+
+def watchlist_version(path=None):
+    """(mtime_ns, size) of the watchlist file, or None if it does not exist."""
+    try:
+        st = os.stat(path or WATCHLIST_FILE)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_watchlist(path=None):
+    """Tickers in the watchlist file; it is only re-read after its mtime or size changes."""
+    path = path or WATCHLIST_FILE
+    version = watchlist_version(path)
+    if version is None:
+        _cache.pop(path, None)
         return []
-    with open(WATCHLIST_FILE, "r") as f:
-        return [line.strip().upper() for line in f if line.strip()]
+    cached = _cache.get(path)
+    if cached is None or cached[0] != version:
+        with open(path, "r") as f:
+            tickers = [line.strip().upper() for line in f if line.strip()]
+        cached = _cache[path] = (version, tickers)
+    return list(cached[1])